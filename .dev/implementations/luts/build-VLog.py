@@ -1,6 +1,25 @@
+"""
+Build the LUTs for VLog footage in ``luts/VLog``.
+
+LUTs are baked in parallel, one process per LUT, and a LUT is only baked again if
+its content hash changed, which is computed from the code and configs its transform
+depends on.
+
+Usage::
+
+    python build-VLog.py
+    python build-VLog.py --resolution 65 --jobs 4
+    python build-VLog.py --resolution 129 --format spi3d --decimals 6
+"""
+
+import argparse
 import dataclasses
+import json
 import logging
+import multiprocessing
+import os
 import sys
+import time
 from pathlib import Path
 from typing import Callable
 from typing import Optional
@@ -9,10 +28,23 @@ import colour
 import numpy
 
 import AgXLib
+from AgXLib._hashing import get_content_hash
+from AgXLib._hashing import get_library_hash
 
 LOGGER = logging.getLogger(__name__)
 
 THIS_DIR = Path(__file__).parent
+LUT_DST_DIR = THIS_DIR.parent.parent.parent / "luts" / "VLog"
+
+# lumix S5IIx documentation mentions "33 points" as maximum
+DEFAULT_RESOLUTION = 33
+
+LUT_FORMATS = (".cube", ".spi3d", ".clf", ".npy")
+
+CACHE_FILENAME = ".build-cache.json"
+"""
+Name of the file storing the content hash of each LUT, in the LUT directory.
+"""
 
 
 def _get_colourspace(name: str) -> colour.RGB_Colourspace:
@@ -61,56 +93,90 @@ class AgXConfig:
         return dataclasses.replace(self)
 
 
-def convert_VLog_to_AgX(
-    rgbarray: numpy.ndarray,
-    colorspace_dst: colour.RGB_Colourspace,
-    agx_config: AgXConfig,
-) -> numpy.ndarray:
-    colorspace_source = _get_colourspace("V-Gamut")
-    colorspace_workspace = _get_colourspace(agx_config.colorspace_workspace_name)
+class VLogToAgXTransform:
+    """
+    Convert VLog imagery to AgX for display.
 
-    # make workspace Linear
-    colorspace_workspace.cctf_decoding = colour.linear_function
-    colorspace_workspace.cctf_encoding = colour.linear_function
+    Everything that only depends on the parameters, like the colourspace conversion
+    matrices (including chromatic adaptation) and the AgX pipeline, is computed
+    once at creation, so calling the transform only cost the per-pixel math.
 
-    new_array = numpy.array(rgbarray)
+    The colourspaces are private copies: nothing global is modified and the
+    transform can be called concurrently.
 
-    new_array = colour.RGB_to_RGB(
-        new_array,
-        input_colourspace=colorspace_source,
-        output_colourspace=colorspace_workspace,
-        apply_cctf_decoding=True,
-        apply_cctf_encoding=True,
-    )
+    Args:
+        colorspace_dst: display colourspace, INCLUDING transfer-function to encode to.
+        agx_config: parameters of the AgX look.
+    """
 
-    if agx_config.pre_grading is not None:
-        new_array = agx_config.pre_grading(new_array)
-
-    new_array = AgXLib.convert_imagery_to_AgX_closeddomain(
-        new_array,
-        colorspace_source,
-        inset=agx_config.inset,
-        rotate=agx_config.rotate,
-        tonescale_min_EV=agx_config.tonescale_min_EV,
-        tonescale_max_EV=agx_config.tonescale_max_EV,
-        tonescale_contrast=agx_config.tonescale_contrast,
-        tonescale_limits=agx_config.tonescale_limits,
-    )
+    def __init__(
+        self,
+        colorspace_dst: colour.RGB_Colourspace,
+        agx_config: AgXConfig,
+    ):
+        self.agx_config = agx_config.copy()
+        self.colorspace_source = _get_colourspace("V-Gamut").copy()
+        # cctf of the workspace are ignored, it is always linear
+        self.colorspace_workspace = _get_colourspace(
+            agx_config.colorspace_workspace_name
+        ).copy()
+        self.colorspace_dst = colorspace_dst.copy()
+
+        self.matrix_source_to_workspace: numpy.ndarray = colour.matrix_RGB_to_RGB(
+            self.colorspace_source,
+            self.colorspace_workspace,
+        )
+        self.matrix_workspace_to_dst: numpy.ndarray = colour.matrix_RGB_to_RGB(
+            self.colorspace_workspace,
+            self.colorspace_dst,
+        )
 
-    # convert for display
-    new_array = colour.RGB_to_RGB(
-        new_array,
-        input_colourspace=colorspace_workspace,
-        output_colourspace=colorspace_dst,
-        apply_cctf_decoding=True,
-        apply_cctf_encoding=True,
-    )
+        # XXX: inset is computed from the V-Gamut primaries even if the imagery
+        #   is in the workspace colourspace at that point.
+        self.pipeline = AgXLib.AgXPipeline(
+            self.colorspace_source,
+            inset=agx_config.inset,
+            rotate=agx_config.rotate,
+            tonescale_min_EV=agx_config.tonescale_min_EV,
+            tonescale_max_EV=agx_config.tonescale_max_EV,
+            tonescale_contrast=agx_config.tonescale_contrast,
+            tonescale_limits=agx_config.tonescale_limits,
+            dtype=numpy.float64,
+        )
+
+    def __call__(self, rgbarray: numpy.ndarray) -> numpy.ndarray:
+        new_array = numpy.asarray(rgbarray, dtype=numpy.float64)
+
+        new_array = self.colorspace_source.cctf_decoding(new_array)
+        new_array = colour.algebra.vector_dot(
+            self.matrix_source_to_workspace, new_array
+        )
+
+        if self.agx_config.pre_grading is not None:
+            new_array = self.agx_config.pre_grading(new_array)
+
+        new_array = self.pipeline.apply(new_array)
 
-    if agx_config.post_grading is not None:
-        new_array = agx_config.post_grading(new_array)
+        # convert for display
+        new_array = colour.algebra.vector_dot(self.matrix_workspace_to_dst, new_array)
+        new_array = self.colorspace_dst.cctf_encoding(new_array)
 
-    new_array = new_array.clip(0.0, 1.0)
-    return new_array
+        if self.agx_config.post_grading is not None:
+            new_array = self.agx_config.post_grading(new_array)
+
+        new_array = new_array.clip(0.0, 1.0)
+        return new_array
+
+
+def convert_VLog_to_AgX(
+    rgbarray: numpy.ndarray,
+    colorspace_dst: colour.RGB_Colourspace,
+    agx_config: AgXConfig,
+) -> numpy.ndarray:
+    """
+    Use :class:`VLogToAgXTransform` instead when converting multiple arrays.
+    """
+    return VLogToAgXTransform(colorspace_dst, agx_config)(rgbarray)
 
 
 """
@@ -180,12 +246,12 @@ AGX_CONFIG_LOOK3.pre_grading = pre_grade2
 
 def transform1(array: numpy.ndarray) -> numpy.ndarray:
     colorspace_dst = _get_colourspace("sRGB")
-    return convert_VLog_to_AgX(array, colorspace_dst, AGX_CONFIG_LOOK1)
+    return VLogToAgXTransform(colorspace_dst, AGX_CONFIG_LOOK1)(array)
 
 
 def transform2(array: numpy.ndarray) -> numpy.ndarray:
     colorspace_dst = _get_colourspace("ITU-R BT.709")
-    return convert_VLog_to_AgX(array, colorspace_dst, AGX_CONFIG_LOOK1)
+    return VLogToAgXTransform(colorspace_dst, AGX_CONFIG_LOOK1)(array)
 
 
 def transform3(array: numpy.ndarray) -> numpy.ndarray:
@@ -195,61 +261,273 @@ def transform3(array: numpy.ndarray) -> numpy.ndarray:
     def bt1886encoding(x):
         return colour.algebra.spow(x, 2.4)
 
-    colorspace_dst = _get_colourspace("ITU-R BT.709")
+    colorspace_dst = _get_colourspace("ITU-R BT.709").copy()
     colorspace_dst.cctf_decoding = bt1886decoding
     colorspace_dst.cctf_encoding = bt1886encoding
-    return convert_VLog_to_AgX(array, colorspace_dst, AGX_CONFIG_LOOK1)
+    return VLogToAgXTransform(colorspace_dst, AGX_CONFIG_LOOK1)(array)
 
 
 def transform4(array: numpy.ndarray) -> numpy.ndarray:
     colorspace_dst = _get_colourspace("sRGB")
-    return convert_VLog_to_AgX(array, colorspace_dst, AGX_CONFIG_LOOK2)
+    return VLogToAgXTransform(colorspace_dst, AGX_CONFIG_LOOK2)(array)
 
 
 def transform5(array: numpy.ndarray) -> numpy.ndarray:
     colorspace_dst = _get_colourspace("sRGB")
-    return convert_VLog_to_AgX(array, colorspace_dst, AGX_CONFIG_LOOK3)
+    return VLogToAgXTransform(colorspace_dst, AGX_CONFIG_LOOK3)(array)
 
 
-def main():
-    LOGGER.info("started")
+# naming convention template (replace between {}):
+# in-{input colorspace}.Agx-{look id}-{workspace colorspace}.out-{output colorspace}
+LUT_CONFIGS = [
+    {"name": "in-VLog.AgX_look1-BT2020.out-sRGB", "func": transform1},
+    {"name": "in-VLog.AgX_look1-BT2020.out-BT709", "func": transform2},
+    {"name": "in-VLog.AgX_look1-BT2020.out-BT1886", "func": transform3},
+    {"name": "in-VLog.AgX_look2-BT2020.out-sRGB", "func": transform4},
+    {"name": "in-VLog.AgX_look3-BT2020.out-sRGB", "func": transform5},
+]
 
-    # lumix S5IIx documentation mentions "33 points" as maximum
-    lut_resolution = 33
-
-    # naming convention template (replace between {}):
-    # in-{input colorspace}.Agx-{look id}-{workspace colorspace}.out-{output colorspace}
-    lut_configs = [
-        {"name": "in-VLog.AgX_look1-BT2020.out-sRGB", "func": transform1},
-        {"name": "in-VLog.AgX_look1-BT2020.out-BT709", "func": transform2},
-        {"name": "in-VLog.AgX_look1-BT2020.out-BT1886", "func": transform3},
-        {"name": "in-VLog.AgX_look2-BT2020.out-sRGB", "func": transform4},
-        {"name": "in-VLog.AgX_look3-BT2020.out-sRGB", "func": transform5},
-    ]
-
-    for lut_config in lut_configs:
-        LOGGER.info(f"generating lut {lut_config['name']} size={lut_resolution} ...")
-        lut = create_lut(
-            lut_config["func"],
-            lut_resolution,
-            name=lut_config["name"],
-            comment="author = Liam Collod",
+LUT_COMMENT = "author = Liam Collod"
+
+"""
+
+BUILD
+
+"""
+
+
+def get_lut_content_hash(
+    processor: Callable[[numpy.ndarray], numpy.ndarray],
+    resolution: int,
+    name: str,
+    comment: str,
+    decimals: int,
+) -> Optional[str]:
+    """
+    Get a hash identifying the content of the LUT that would be created with the
+    given arguments.
+
+    The processor is hashed with everything it depends on in this script (functions
+    called, AgXConfig looks, grading functions), while AgXLib is identified by the
+    hash of its sources and other packages by their version.
+
+    Returns:
+        None if the processor depends on objects whose content can't be hashed, in
+        which case the LUT must always be baked.
+    """
+    return get_content_hash(
+        processor,
+        create_lut,
+        resolution,
+        name,
+        comment,
+        decimals,
+        get_library_hash(),
+    )
+
+
+@dataclasses.dataclass
+class LutJob:
+    name: str
+    processor: Callable[[numpy.ndarray], numpy.ndarray]
+    resolution: int
+    comment: str
+    dst_path: Path
+    """
+    file to write, its extension defines the format of the LUT.
+    """
+    decimals: int
+    content_hash: Optional[str]
+    """
+    None if the content can't be identified, the LUT is then always baked.
+    """
+
+
+@dataclasses.dataclass
+class LutJobResult:
+    name: str
+    dst_path: Path
+    content_hash: Optional[str]
+    skipped: bool = False
+    bake_time: float = 0.0
+    write_time: float = 0.0
+
+
+def run_lut_job(job: LutJob) -> LutJobResult:
+    """
+    Bake the LUT and write it to disk.
+
+    Intended to be run in its own process.
+    """
+    LOGGER.info(f"generating lut {job.name} size={job.resolution} ...")
+    start_time = time.perf_counter()
+    lut = create_lut(
+        job.processor,
+        job.resolution,
+        name=job.name,
+        comment=job.comment,
+    )
+    bake_time = time.perf_counter() - start_time
+
+    LOGGER.info(f"writting lut to <{job.dst_path}>")
+    start_time = time.perf_counter()
+    AgXLib.write_LUT3D(
+        job.dst_path,
+        lut.table,
+        name=lut.name,
+        comments=lut.comments,
+        decimals=job.decimals,
+    )
+    write_time = time.perf_counter() - start_time
+
+    return LutJobResult(
+        name=job.name,
+        dst_path=job.dst_path,
+        content_hash=job.content_hash,
+        bake_time=bake_time,
+        write_time=write_time,
+    )
+
+
+def _read_cache(cache_path: Path) -> dict[str, str]:
+    if not cache_path.exists():
+        return {}
+    try:
+        return json.loads(cache_path.read_text())
+    except ValueError as error:
+        LOGGER.warning(f"ignoring invalid cache <{cache_path}>: {error}")
+        return {}
+
+
+def _log_summary(results: list[LutJobResult], total_time: float):
+    LOGGER.info(f"{'lut': <45} {'status': <8} {'bake': >9} {'write': >9}")
+    for result in results:
+        status = "cached" if result.skipped else "baked"
+        LOGGER.info(
+            f"{result.name: <45} {status: <8} "
+            f"{result.bake_time: >8.2f}s {result.write_time: >8.2f}s"
         )
+    LOGGER.info(f"total {total_time:.2f}s")
 
-        lust_dst_dir = THIS_DIR.parent.parent.parent / "luts" / "VLog"
-        lust_dst_dir.mkdir(exist_ok=True)
-        lut_dst_path = lust_dst_dir / f"{lut_config['name']}.cube"
 
-        LOGGER.info(f"writting lut to <{lut_dst_path}>")
-        colour.write_LUT(lut, str(lut_dst_path))
+def get_cli(argv=None):
+    argv = argv or sys.argv[1:]
+    parser = argparse.ArgumentParser(
+        "build-VLog",
+        description="Build the AgX LUTs for VLog footage.",
+    )
+    parser.add_argument(
+        "--resolution",
+        type=int,
+        default=DEFAULT_RESOLUTION,
+        help="Number of samples per side of the cube, like 33, 65 or 129.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=None,
+        help=(
+            f"Directory to write the LUTs to, default to <{LUT_DST_DIR}> for the "
+            f"default resolution, else to a subdirectory named after the resolution."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        choices=[suffix.lstrip(".") for suffix in LUT_FORMATS],
+        default="cube",
+        help="File format of the LUTs, npy is a lossless binary numpy array.",
+    )
+    parser.add_argument(
+        "--decimals",
+        type=int,
+        default=7,
+        help="Number of decimals written per value, for text formats.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of LUTs baked in parallel.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Bake all LUTs even if their content didn't change.",
+    )
+    parsed = parser.parse_args(argv)
+    return parsed
+
 
+def main(argv=None):
+    LOGGER.info("started")
+    start_time = time.perf_counter()
+    cli = get_cli(argv)
+
+    lut_dst_dir: Path = cli.output_dir
+    if lut_dst_dir is None:
+        lut_dst_dir = LUT_DST_DIR
+        if cli.resolution != DEFAULT_RESOLUTION:
+            lut_dst_dir = lut_dst_dir / str(cli.resolution)
+    lut_dst_dir.mkdir(parents=True, exist_ok=True)
+
+    cache_path = lut_dst_dir / CACHE_FILENAME
+    cache = {} if cli.force else _read_cache(cache_path)
+
+    results: list[LutJobResult] = []
+    jobs: list[LutJob] = []
+    for lut_config in LUT_CONFIGS:
+        job = LutJob(
+            name=lut_config["name"],
+            processor=lut_config["func"],
+            resolution=cli.resolution,
+            comment=LUT_COMMENT,
+            dst_path=lut_dst_dir / f"{lut_config['name']}.{cli.format}",
+            decimals=cli.decimals,
+            content_hash=get_lut_content_hash(
+                lut_config["func"],
+                cli.resolution,
+                name=lut_config["name"],
+                comment=LUT_COMMENT,
+                decimals=cli.decimals,
+            ),
+        )
+        if job.content_hash is None:
+            LOGGER.warning(f"cannot hash the content of <{job.name}>, always baked")
+        cached_hash = cache.get(job.dst_path.name)
+        if (
+            job.content_hash is not None
+            and cached_hash == job.content_hash
+            and job.dst_path.exists()
+        ):
+            LOGGER.info(f"skipping unchanged lut <{job.dst_path}>")
+            results.append(
+                LutJobResult(job.name, job.dst_path, job.content_hash, skipped=True)
+            )
+        else:
+            jobs.append(job)
+
+    if jobs:
+        processes = max(min(cli.jobs, len(jobs)), 1)
+        with multiprocessing.Pool(processes) as pool:
+            for result in pool.imap_unordered(run_lut_job, jobs):
+                results.append(result)
+                if result.content_hash is None:
+                    cache.pop(result.dst_path.name, None)
+                else:
+                    cache[result.dst_path.name] = result.content_hash
+                # saved after each LUT so a failure doesn't discard the finished ones
+                cache_path.write_text(json.dumps(cache, indent=4, sort_keys=True))
+
+    order = [lut_config["name"] for lut_config in LUT_CONFIGS]
+    results.sort(key=lambda result: order.index(result.name))
+    _log_summary(results, time.perf_counter() - start_time)
     LOGGER.info("finished")
 
 
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.INFO,
-        format="{levelname: <7} | {asctime} [{name}] {message}",
+        format="{levelname: <7} | {asctime} [{processName}] [{name}] {message}",
         style="{",
         stream=sys.stdout,
     )
@@ -435,14 +435,14 @@ class AgXcConfig(ocio.Config):
             colorspace.allocation = ocio.ALLOCATION_UNIFORM
             colorspace.allocationVars = [-12.47393, 4.026069]
 
-            inset_matrix = AgXLib.get_reshaped_colorspace_matrix(
+            _, inset_matrix = AgXLib.get_reshape_matrices(
                 src_gamut=srgb_colorspace.primaries,
                 src_whitepoint=whitepoint_d65,
                 inset_r=0.2,
                 inset_g=0.2,
                 inset_b=0.2,
             )
-            inset_matrix = matrix_format_ocio(numpy.linalg.inv(inset_matrix))
+            inset_matrix = matrix_format_ocio(inset_matrix)
             colorspace.set_transforms_from_reference(
                 [
                     # the 2 CLDTransform are a hack to clamp negatives
@@ -854,12 +854,19 @@ class AgXcConfig(ocio.Config):
         content = self.as_text()
         file_path.write_text(content)
 
-    def save_luts_to_disk(self, directory):
+    def save_luts_to_disk(self, directory, decimals: int = 7):
         target_dir = directory / self.lut_dir_name
         for lut_filename, lut in self._luts.items():
             target_path = target_dir / lut_filename
             LOGGER.debug(f"writing {target_path}")
-            colour.write_LUT(lut, str(target_path))
+            AgXLib.write_LUT1D(
+                target_path,
+                lut.table,
+                domain=tuple(lut.domain),
+                name=lut.name,
+                comments=lut.comments,
+                decimals=decimals,
+            )
 
 
 def get_cli(argv=None):
@@ -0,0 +1,430 @@
+"""
+Benchmark the python implementations of AgX and compare them against a stored baseline.
+
+Each benchmark is run for every resolution and dtype requested and report its
+median throughput (in mega-pixels or calls per second), and the peak memory allocated
+during one run.
+
+Usage::
+
+    python benchmark.py --resolutions hd 4k --dtypes float32 float64
+    python benchmark.py --save-baseline
+
+The exit code is 1 if any benchmark regressed compared to the baseline.
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import numpy
+
+import AgXLib
+
+LOGGER = logging.getLogger(__name__)
+
+THIS_DIR = Path(__file__).parent
+REPO_ROOT = THIS_DIR.parent.parent.parent.parent.parent
+DEFAULT_BASELINE_PATH = THIS_DIR / "baseline.json"
+
+RESOLUTIONS: dict[str, tuple[int, int]] = {
+    "hd": (1080, 1920),
+    "4k": (2160, 3840),
+    "8k": (4320, 7680),
+}
+DTYPES = ("float32", "float64")
+
+
+def _import_from_path(name: str, path: Path):
+    """
+    Import a python file that is not importable normally (like ``AgX.numpy.py``).
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _get_open_domain_image(shape: tuple[int, int], dtype: str) -> numpy.ndarray:
+    generator = numpy.random.default_rng(seed=9)
+    array = generator.uniform(-0.05, 16.0, size=shape + (3,))
+    return array.astype(dtype)
+
+
+def _get_log_image(shape: tuple[int, int], dtype: str) -> numpy.ndarray:
+    generator = numpy.random.default_rng(seed=9)
+    array = generator.uniform(0.0, 1.0, size=shape + (3,))
+    return array.astype(dtype)
+
+
+@dataclasses.dataclass
+class Benchmark:
+    """
+    A function to measure with the setup that create its arguments.
+
+    The setup receive the (height, width) resolution and the dtype and must return
+    a callable that takes no argument and perform the work to measure. It can also
+    return a context manager giving that callable, to release the resources it
+    needed once the benchmark is finished.
+    """
+
+    name: str
+    setup: Callable[[tuple[int, int], str], Callable[[], object]]
+    per_pixel: bool = True
+    """
+    False if the benchmark doesn't depend on the resolution, it is then only run once
+    and its pixel count is given by ``pixels``.
+    """
+    pixels: int = 1
+    unit: str = "Mpix/s"
+    """
+    Unit of the throughput: "Mpix/s" for the mega-pixels processed per second or
+    "calls/s" for benchmarks that don't process pixels.
+    """
+
+
+def _setup_tonescale(shape, dtype):
+    array = _get_log_image(shape, dtype)
+    return lambda: AgXLib.apply_AgX_tonescale(array, dtype=dtype)
+
+
+def _setup_log2_encode(shape, dtype):
+    array = _get_open_domain_image(shape, dtype)
+    return lambda: AgXLib.convert_open_domain_to_normalized_log2(array, dtype=dtype)
+
+
+def _setup_log2_decode(shape, dtype):
+    array = _get_log_image(shape, dtype)
+    return lambda: AgXLib.convert_normalized_log2_to_open_domain(array, dtype=dtype)
+
+
+def _setup_reshape_matrix(shape, dtype):
+    gamut = numpy.array([[0.64, 0.33], [0.3, 0.6], [0.15, 0.06]])
+    whitepoint = numpy.array([0.3127, 0.329])
+    return lambda: AgXLib.get_reshaped_colorspace_matrix(
+        gamut, whitepoint, 0.2, 0.1, 0.3, 5.0, 0.0, -6.0
+    )
+
+
+def _setup_convert_imagery(shape, dtype):
+    import colour
+
+    array = _get_open_domain_image(shape, dtype)
+    colorspace = colour.RGB_COLOURSPACES["ITU-R BT.2020"]
+    return lambda: AgXLib.convert_imagery_to_AgX_closeddomain(
+        array,
+        colorspace,
+        inset=(0.23, 0.15, 0.35),
+        rotate=(5, 0, -6),
+        dtype=dtype,
+    )
+
+
+def _setup_lut3d(shape, dtype):
+    import colour
+
+    array = _get_open_domain_image(shape, dtype)
+    pipeline = AgXLib.AgXPipeline(
+        colour.RGB_COLOURSPACES["ITU-R BT.2020"],
+        inset=(0.23, 0.15, 0.35),
+        rotate=(5, 0, -6),
+        dtype=dtype,
+    )
+    lut = AgXLib.bake_AgX_LUT3D(pipeline, size=33)
+    return lambda: lut.apply(array, dtype=dtype)
+
+
+@contextlib.contextmanager
+def _setup_write_lut3d(shape, dtype):
+    table = _get_log_image((65 * 65, 65), dtype).reshape((65, 65, 65, 3))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "benchmark.cube"
+        yield lambda: AgXLib.write_LUT3D(path, table, name="benchmark")
+
+
+def _setup_applyAgX(shape, dtype):
+    agx_numpy = _import_from_path("AgX_numpy", REPO_ROOT / "python" / "AgX.numpy.py")
+    array = _get_open_domain_image(shape, dtype)
+    return lambda: agx_numpy.applyAgX(array)
+
+
+def _setup_build_vlog_lut(shape, dtype):
+    build_vlog = _import_from_path(
+        "build_VLog",
+        REPO_ROOT / ".dev" / "implementations" / "luts" / "build-VLog.py",
+    )
+    return lambda: build_vlog.create_lut(build_vlog.transform1, 33, name="benchmark")
+
+
+def _setup_import(code: str):
+    """
+    Measure the time taken by a new python process to run the given code, which
+    include the interpreter startup.
+    """
+
+    def _setup(shape, dtype):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [str(Path(AgXLib.__file__).parent.parent), env.get("PYTHONPATH", "")]
+        )
+        command = [sys.executable, "-c", code]
+        return lambda: subprocess.run(command, check=True, env=env)
+
+    return _setup
+
+
+BENCHMARKS: list[Benchmark] = [
+    Benchmark("import AgXLib", _setup_import("import AgXLib"), False, unit="calls/s"),
+    Benchmark(
+        "import AgXLib.AgXPipeline",
+        _setup_import("import AgXLib; AgXLib.AgXPipeline"),
+        False,
+        unit="calls/s",
+    ),
+    Benchmark("apply_AgX_tonescale", _setup_tonescale),
+    Benchmark("convert_open_domain_to_normalized_log2", _setup_log2_encode),
+    Benchmark("convert_normalized_log2_to_open_domain", _setup_log2_decode),
+    Benchmark(
+        "get_reshaped_colorspace_matrix", _setup_reshape_matrix, False, unit="calls/s"
+    ),
+    Benchmark("convert_imagery_to_AgX_closeddomain", _setup_convert_imagery),
+    Benchmark("LUT3D.apply[33]", _setup_lut3d),
+    Benchmark("write_LUT3D.cube[65]", _setup_write_lut3d, False, 65**3),
+    Benchmark("AgX.numpy.applyAgX", _setup_applyAgX),
+    Benchmark("build-VLog.create_lut[33]", _setup_build_vlog_lut, False, 33**3),
+]
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    name: str
+    resolution: str
+    dtype: str
+    seconds: float
+    """
+    median duration of a run
+    """
+    throughput: float
+    unit: str
+    peak_memory_mb: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}|{self.resolution}|{self.dtype}"
+
+
+def run_benchmark(
+    benchmark: Benchmark,
+    resolution: str,
+    dtype: str,
+    repeat: int,
+) -> BenchmarkResult:
+    shape = RESOLUTIONS[resolution]
+    with contextlib.ExitStack() as stack:
+        function = benchmark.setup(shape, dtype)
+        if isinstance(function, contextlib.AbstractContextManager):
+            function = stack.enter_context(function)
+        # warmup, which also fill any cache the function might rely on
+        function()
+
+        timings = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start_time)
+        # the median is less sensitive than the minimum to a single lucky run
+        seconds = statistics.median(timings)
+
+        # numpy report its allocations to tracemalloc
+        tracemalloc.start()
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if benchmark.unit == "calls/s":
+        throughput = 1.0 / seconds
+    else:
+        pixels = shape[0] * shape[1] if benchmark.per_pixel else benchmark.pixels
+        throughput = pixels / seconds / 1e6
+    return BenchmarkResult(
+        name=benchmark.name,
+        resolution=resolution if benchmark.per_pixel else "-",
+        dtype=dtype if benchmark.per_pixel else "-",
+        seconds=seconds,
+        throughput=throughput,
+        unit=benchmark.unit,
+        peak_memory_mb=peak_memory / 1024**2,
+    )
+
+
+def compare_results(
+    results: list[BenchmarkResult],
+    baseline: dict,
+    tolerance: float,
+) -> list[str]:
+    """
+    Returns:
+        list of human-readable regressions, empty if none.
+    """
+    regressions = []
+    baseline_results = baseline.get("results", {})
+    for result in results:
+        reference = baseline_results.get(result.key)
+        if reference is None or reference.get("unit") != result.unit:
+            continue
+
+        minimum_throughput = reference["throughput"] * (1.0 - tolerance)
+        if result.throughput < minimum_throughput:
+            regressions.append(
+                f"{result.key}: throughput {result.throughput:.3f} {result.unit} "
+                f"< baseline {reference['throughput']:.3f} {result.unit}"
+            )
+
+        maximum_memory = reference["peak_memory_mb"] * (1.0 + tolerance)
+        # ignore tiny allocations which are too noisy to compare
+        if result.peak_memory_mb > max(maximum_memory, 1.0):
+            regressions.append(
+                f"{result.key}: peak memory {result.peak_memory_mb:.1f} MB "
+                f"> baseline {reference['peak_memory_mb']:.1f} MB"
+            )
+
+    return regressions
+
+
+def _get_machine_info() -> dict:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+    }
+
+
+def get_cli(argv=None):
+    argv = argv or sys.argv[1:]
+    parser = argparse.ArgumentParser(
+        "agxc-benchmark",
+        description="Benchmark the python implementations of AgX.",
+    )
+    parser.add_argument(
+        "--resolutions",
+        nargs="+",
+        choices=list(RESOLUTIONS),
+        default=list(RESOLUTIONS),
+    )
+    parser.add_argument("--dtypes", nargs="+", choices=DTYPES, default=list(DTYPES))
+    parser.add_argument(
+        "--filter",
+        type=str,
+        default="",
+        help="Only run benchmarks whose name contains this string.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of measured runs, the median is reported.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE_PATH,
+        help="Path to the json file storing the baseline results.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Overwrite the baseline with the results instead of comparing.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.4,
+        help=(
+            "Allowed relative slowdown / memory increase before being a regression. "
+            "Run-to-run noise is commonly above 25% on a busy machine."
+        ),
+    )
+    parsed = parser.parse_args(argv)
+    return parsed
+
+
+def main(argv=None) -> int:
+    cli = get_cli(argv)
+
+    results: list[BenchmarkResult] = []
+    for benchmark in BENCHMARKS:
+        if cli.filter not in benchmark.name:
+            continue
+
+        resolutions = cli.resolutions if benchmark.per_pixel else cli.resolutions[:1]
+        dtypes = cli.dtypes if benchmark.per_pixel else cli.dtypes[:1]
+        for resolution in resolutions:
+            for dtype in dtypes:
+                result = run_benchmark(benchmark, resolution, dtype, cli.repeat)
+                LOGGER.info(
+                    f"{result.key: <60} {result.seconds * 1000: >10.2f} ms "
+                    f"{result.throughput: >10.3f} {result.unit: <7} "
+                    f"{result.peak_memory_mb: >10.1f} MB"
+                )
+                results.append(result)
+
+    if cli.save_baseline:
+        baseline = {"machine": _get_machine_info(), "results": {}}
+        if cli.baseline.exists():
+            previous = json.loads(cli.baseline.read_text())
+            # results of other machines can't be compared, so they are not kept
+            if previous.get("machine") == baseline["machine"]:
+                baseline["results"] = previous["results"]
+            else:
+                LOGGER.warning(
+                    f"discarding baseline results of a different machine: "
+                    f"{previous.get('machine')}"
+                )
+        for result in results:
+            baseline["results"][result.key] = dataclasses.asdict(result)
+        cli.baseline.write_text(json.dumps(baseline, indent=4, sort_keys=True))
+        LOGGER.info(f"saved baseline to <{cli.baseline}>")
+        return 0
+
+    if not cli.baseline.exists():
+        LOGGER.warning(f"no baseline found at <{cli.baseline}>")
+        return 0
+
+    baseline = json.loads(cli.baseline.read_text())
+    if baseline.get("machine") != _get_machine_info():
+        LOGGER.warning(
+            f"baseline was generated on a different machine: {baseline.get('machine')}"
+        )
+
+    regressions = compare_results(results, baseline, cli.tolerance)
+    for regression in regressions:
+        LOGGER.error(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+
+    LOGGER.info("no regression compared to baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="{levelname: <7} | {asctime} [{name}] {message}",
+        style="{",
+        stream=sys.stdout,
+    )
+    sys.exit(main())
@@ -1,7 +1,17 @@
+import concurrent.futures
+import threading
+import tracemalloc
+
 import colour
 import numpy
+import pytest
 
+from AgXLib import AgXPipeline
 from AgXLib import convert_imagery_to_AgX_closeddomain
+from AgXLib import apply_AgX_tonescale
+from AgXLib import convert_open_domain_to_normalized_log2
+from AgXLib import get_reshaped_colorspace_matrix
+from AgXLib.apply import DEFAULT_TILE_BYTES
 
 
 def _make_linear(colorspace: colour.RGB_Colourspace) -> colour.RGB_Colourspace:
@@ -10,6 +20,28 @@ def _make_linear(colorspace: colour.RGB_Colourspace) -> colour.RGB_Colourspace:
     return colorspace
 
 
+def _convert_reference(src_array, src_colorspace, inset, rotate):
+    # step-by-step implementation of the DRT, to compare optimized variants against
+    matrix = get_reshaped_colorspace_matrix(
+        src_colorspace.primaries,
+        src_colorspace.whitepoint,
+        *inset,
+        *rotate,
+    )
+    array = src_array.clip(min=0.0)
+    array = colour.algebra.vector_dot(numpy.linalg.inv(matrix), array)
+    array = convert_open_domain_to_normalized_log2(array)
+    array = array.clip(0.0, 1.0)
+    array = apply_AgX_tonescale(array)
+    return colour.algebra.spow(array, 2.4)
+
+
+def _get_test_image() -> numpy.ndarray:
+    generator = numpy.random.default_rng(seed=5)
+    # open-domain values with some negatives
+    return generator.uniform(-0.1, 12.0, size=(16, 24, 3))
+
+
 def test_convert_imagery_to_AgX_closeddomain():
     source = numpy.array([0.0])
     source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
@@ -22,3 +54,193 @@ def test_convert_imagery_to_AgX_closeddomain():
     )
     # TODO finish test, for now just test there is no error raised
     # numpy.testing.assert_allclose(result, expected)
+
+    source = _get_test_image()
+    inset = (0.15, 0.2, 0.1)
+    rotate = (5.0, 0.0, -6.0)
+    expected = _convert_reference(source, source_colorspace, inset, rotate)
+    result = convert_imagery_to_AgX_closeddomain(
+        source,
+        source_colorspace,
+        inset=inset,
+        rotate=rotate,
+    )
+    numpy.testing.assert_allclose(result, expected, atol=1e-12)
+
+
+def test_AgXPipeline():
+    source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
+    inset = (0.15, 0.2, 0.1)
+    rotate = (5.0, 0.0, -6.0)
+    pipeline = AgXPipeline(source_colorspace, inset=inset, rotate=rotate)
+
+    source = _get_test_image()
+    source_copy = source.copy()
+    expected = _convert_reference(source, source_colorspace, inset, rotate)
+
+    result = pipeline.apply(source)
+    numpy.testing.assert_allclose(result, expected, atol=1e-12)
+    numpy.testing.assert_equal(source, source_copy)
+
+    # scratch buffers are reused between calls
+    result2 = pipeline.apply(source)
+    numpy.testing.assert_equal(result, result2)
+    assert result is not result2
+
+    out = numpy.empty_like(source)
+    result3 = pipeline.apply(source, out=out)
+    assert result3 is out
+    numpy.testing.assert_equal(result, result3)
+
+    # in-place
+    result4 = pipeline.apply(source, out=source)
+    assert result4 is source
+    numpy.testing.assert_equal(result, result4)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_AgXPipeline_apply_memory(dtype):
+    colorspace = colour.RGB_COLOURSPACES["ITU-R BT.2020"]
+    pipeline = AgXPipeline(colorspace, (0.2, 0.1, 0.3), (5, 0, -6), dtype=dtype)
+    generator = numpy.random.default_rng(seed=5)
+    source = generator.uniform(-0.1, 16.0, size=(1080, 1920, 3)).astype(dtype)
+    # allocate the scratch buffers
+    pipeline.apply(source[:8].copy(), out=None)
+    pipeline.apply(source.copy())
+
+    # in-place processing only allocate temporary arrays of the size of a band
+    tracemalloc.start()
+    try:
+        pipeline.apply(source, out=source)
+        _, pipeline_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        convert_imagery_to_AgX_closeddomain(
+            source, colorspace, (0.2, 0.1, 0.3), (5, 0, -6), out=source, dtype=dtype
+        )
+        _, function_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert pipeline_peak < 4 * DEFAULT_TILE_BYTES
+    # the function also allocate the scratch buffer of a new pipeline
+    assert function_peak < 4 * DEFAULT_TILE_BYTES
+
+
+def test_AgXPipeline_scratch():
+    source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
+    pipeline = AgXPipeline(source_colorspace, inset=(0.2, 0.2, 0.2), rotate=(0, 0, 0))
+    source = _get_test_image()
+    expected = pipeline.apply(source)
+
+    # a single buffer per thread, grown to the biggest array processed
+    for rows in (3, 16, 5, 1):
+        result = pipeline.apply_tiled(source[:rows], tile_rows=rows)
+        numpy.testing.assert_equal(result, expected[:rows])
+    assert pipeline._local.scratch.nbytes == source.nbytes
+
+    pipeline.clear_scratch()
+    assert getattr(pipeline._local, "scratch", None) is None
+    numpy.testing.assert_equal(pipeline.apply(source), expected)
+
+
+def test_AgXPipeline_apply_tiled(tmp_path):
+    source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
+    pipeline = AgXPipeline(source_colorspace, inset=(0.2, 0.2, 0.2), rotate=(0, 0, 0))
+
+    source = _get_test_image()
+    expected = pipeline.apply(source)
+
+    result = pipeline.apply_tiled(source, tile_rows=5)
+    numpy.testing.assert_equal(result, expected)
+
+    result = pipeline.apply_tiled(source)
+    numpy.testing.assert_equal(result, expected)
+
+    source_path = tmp_path / "source.bin"
+    source_map = numpy.memmap(
+        source_path, dtype=numpy.float64, mode="w+", shape=source.shape
+    )
+    source_map[:] = source
+    target_map = numpy.memmap(
+        tmp_path / "target.bin", dtype=numpy.float64, mode="w+", shape=source.shape
+    )
+    result = pipeline.apply_tiled(source_map, out=target_map, tile_rows=3)
+    assert result is target_map
+    numpy.testing.assert_equal(result, expected)
+
+    # in-place
+    result = pipeline.apply_tiled(source_map, out=source_map, tile_rows=3)
+    numpy.testing.assert_equal(result, expected)
+
+
+def test_AgXPipeline_apply_tiled_workers():
+    source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
+    source = _get_test_image()
+
+    with AgXPipeline(source_colorspace, (0.2, 0.2, 0.2), (3, 0, 0)) as pipeline:
+        expected = pipeline.apply_tiled(source, tile_rows=2, workers=1)
+        result = pipeline.apply_tiled(source, tile_rows=2, workers=4)
+        numpy.testing.assert_equal(result, expected)
+        # worker threads and their buffers are reused
+        result = pipeline.apply_tiled(source, tile_rows=2, workers=4)
+        numpy.testing.assert_equal(result, expected)
+        result = pipeline.apply_tiled(source, tile_rows=2, workers=None)
+        numpy.testing.assert_equal(result, expected)
+
+        # threads sharing the pipeline also share a single executor
+        barrier = threading.Barrier(8)
+
+        def _get_executor(_):
+            barrier.wait()
+            return pipeline._get_executor(3)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            executors = list(executor.map(_get_executor, range(8)))
+        assert all(executor is executors[0] for executor in executors)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = executor.map(
+                lambda _: pipeline.apply_tiled(source, tile_rows=2, workers=3),
+                range(4),
+            )
+            for result in results:
+                numpy.testing.assert_equal(result, expected)
+
+
+def test_AgXPipeline_apply_batch():
+    source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
+    pipeline = AgXPipeline(source_colorspace, (0.2, 0.2, 0.2), (3, 0, 0))
+    frames = numpy.stack([_get_test_image() * factor for factor in (0.5, 1.0, 2.0)])
+    expected = numpy.stack([pipeline.apply(frame) for frame in frames])
+
+    result = pipeline.apply_batch(frames)
+    assert result.shape == frames.shape
+    numpy.testing.assert_equal(result, expected)
+
+    result = pipeline.apply_batch(frames, out=frames, tile_rows=4)
+    assert result is frames
+    numpy.testing.assert_equal(result, expected)
+
+
+def test_AgXPipeline_apply_sequence():
+    source_colorspace = _make_linear(colour.RGB_COLOURSPACES["sRGB"])
+    pipeline = AgXPipeline(source_colorspace, (0.2, 0.2, 0.2), (3, 0, 0))
+    factors = (0.5, 1.0, 2.0, 4.0)
+    expected = [pipeline.apply(_get_test_image() * factor) for factor in factors]
+
+    def read_frames():
+        for factor in factors:
+            yield _get_test_image() * factor
+
+    for prefetch in (False, True):
+        results = list(pipeline.apply_sequence(read_frames(), prefetch=prefetch))
+        assert len(results) == len(expected)
+        for result, expected_frame in zip(results, expected):
+            numpy.testing.assert_equal(result, expected_frame)
+
+    previous = None
+    sequence = pipeline.apply_sequence(read_frames(), prefetch=True, reuse_output=True)
+    for result, expected_frame in zip(sequence, expected):
+        numpy.testing.assert_equal(result, expected_frame)
+        assert previous is None or result is previous
+        previous = result
@@ -1,3 +1,5 @@
+import warnings
+
 import numpy
 
 from AgXLib.cctf import convert_open_domain_to_normalized_log2
@@ -32,3 +34,80 @@ def test_convert_normalized_log2_to_open_domain():
     intermediate = convert_open_domain_to_normalized_log2(source)
     result = convert_normalized_log2_to_open_domain(intermediate)
     numpy.testing.assert_allclose(result, expected)
+
+
+def test_cctf_out():
+    source = numpy.array([0.333, -0.05, 2.83, 0.0, 0.00123])
+    expected = convert_open_domain_to_normalized_log2(source)
+    out = numpy.empty_like(source)
+    result = convert_open_domain_to_normalized_log2(source, out=out)
+    assert result is out
+    numpy.testing.assert_equal(result, expected)
+
+    expected = convert_normalized_log2_to_open_domain(result)
+    result = convert_normalized_log2_to_open_domain(result, out=result)
+    assert result is out
+    numpy.testing.assert_equal(result, expected)
+
+
+def test_convert_open_domain_to_normalized_log2_clamp():
+    source = numpy.array([0.333, -0.05, 2.83, 0.0, 0.00123, 1e-17, 500.0])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        unclamped = convert_open_domain_to_normalized_log2(source)
+        result = convert_open_domain_to_normalized_log2(source, clamp=True)
+    numpy.testing.assert_equal(result, numpy.clip(unclamped, 0.0, 1.0))
+    assert result[-1] == 1.0
+
+    # same as the reference formula
+    expected = (numpy.log2(source[[0, 2, 4]] / 0.18) + 10.0) / 16.5
+    numpy.testing.assert_allclose(unclamped[[0, 2, 4]], expected, rtol=1e-14)
+
+    # a minimum low enough that clamping doesn't zero values below epsilon
+    result = convert_open_domain_to_normalized_log2(source, minimum_ev=-60, clamp=True)
+    assert result[1] == result[3] == result[5] == 0.0
+    result = convert_open_domain_to_normalized_log2(
+        numpy.array([1e-15]), minimum_ev=-60, clamp=True
+    )
+    assert result[0] > 0.0
+
+
+def test_convert_open_domain_to_normalized_log2_per_channel():
+    source = numpy.array([[0.333, 0.333, 0.333], [-0.05, 2.83, 0.00123]])
+    minimum_ev = numpy.array([-10.0, -8.0, -12.0])
+    result = convert_open_domain_to_normalized_log2(source, minimum_ev=minimum_ev)
+    for channel in range(3):
+        expected = convert_open_domain_to_normalized_log2(
+            source[:, channel], minimum_ev=minimum_ev[channel]
+        )
+        numpy.testing.assert_allclose(result[:, channel], expected, rtol=1e-15)
+
+
+def test_cctf_per_channel():
+    source = numpy.array([[0.333, 2.83, 0.00123], [0.18, 0.05, 12.0]])
+    minimum_ev = (-10.0, -8.0, -12.0)
+    maximum_ev = (6.5, 4.0, 7.5)
+    encoded = convert_open_domain_to_normalized_log2(
+        source, minimum_ev=minimum_ev, maximum_ev=maximum_ev
+    )
+    for channel in range(3):
+        expected = convert_open_domain_to_normalized_log2(
+            source[:, channel],
+            minimum_ev=minimum_ev[channel],
+            maximum_ev=maximum_ev[channel],
+        )
+        numpy.testing.assert_allclose(encoded[:, channel], expected)
+
+    result = convert_normalized_log2_to_open_domain(
+        encoded, minimum_ev=minimum_ev, maximum_ev=maximum_ev
+    )
+    numpy.testing.assert_allclose(result, source)
+
+    result = convert_normalized_log2_to_open_domain(
+        encoded.astype(numpy.float32),
+        minimum_ev=minimum_ev,
+        maximum_ev=maximum_ev,
+        dtype=numpy.float32,
+    )
+    assert result.dtype == numpy.float32
+    numpy.testing.assert_allclose(result, source, rtol=1e-5)
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy
+import pytest
+
+import AgXLib
+from AgXLib import _colour
+
+colour = pytest.importorskip("colour")
+
+
+def test_normalised_primary_matrix():
+    for name in ("sRGB", "ITU-R BT.2020", "ACEScg", "DCI-P3"):
+        colorspace = colour.RGB_COLOURSPACES[name]
+        expected = colour.normalised_primary_matrix(
+            colorspace.primaries, colorspace.whitepoint
+        )
+        result = _colour.normalised_primary_matrix(
+            colorspace.primaries, colorspace.whitepoint
+        )
+        numpy.testing.assert_allclose(result, expected, rtol=0, atol=1e-14)
+
+
+def test_vector_dot():
+    matrix = colour.RGB_COLOURSPACES["ACEScg"].matrix_RGB_to_XYZ
+    array = numpy.random.default_rng(seed=1).uniform(-1.0, 2.0, size=(16, 8, 3))
+    expected = colour.algebra.vector_dot(matrix, array)
+    numpy.testing.assert_allclose(_colour.vector_dot(matrix, array), expected)
+
+    array = numpy.linspace(0.0, 1.0, 10).reshape((10, 1))
+    expected = colour.algebra.vector_dot(matrix, array)
+    numpy.testing.assert_allclose(_colour.vector_dot(matrix, array), expected)
+
+
+def test_lazy_import():
+    code = (
+        "import sys, AgXLib;"
+        "assert 'AgXLib.apply' not in sys.modules;"
+        "AgXLib.AgXPipeline;"
+        "assert 'AgXLib.apply' in sys.modules;"
+        "assert 'colour' not in sys.modules"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(Path(AgXLib.__file__).parent.parent), env.get("PYTHONPATH", "")]
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+    # submodules are attributes of the package without importing them explicitly
+    submodules = ("reshape", "tonescale", "cctf", "apply", "lut3d", "lut_io")
+    code = "import AgXLib;" + ";".join(f"AgXLib.{name}" for name in submodules)
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+    assert "AgXPipeline" in dir(AgXLib)
+    with pytest.raises(AttributeError):
+        AgXLib.not_an_attribute
@@ -1,6 +1,9 @@
+import colour
 import numpy
 
+from AgXLib.grading import saturation
 from AgXLib.grading import sigmoid_parabolic
+from AgXLib.grading import spow
 
 
 def test_sigmoid_parabolic():
@@ -18,3 +21,37 @@ def test_sigmoid_parabolic():
     expected = numpy.array([0.02429, 0.21853, 0.52629])
     result = sigmoid_parabolic(source, (1.86, 1.5, 1.9), 0.6)
     numpy.testing.assert_allclose(result, expected, atol=10e-5)
+
+    # in-place
+    source = numpy.array([[0.107, 0.306, 0.56]])
+    result = sigmoid_parabolic(source, (1.86, 1.5, 1.9), 0.6, out=source)
+    assert result is source
+    numpy.testing.assert_allclose(result, [expected], atol=10e-5)
+
+
+def test_spow():
+    source = numpy.array([-0.5, -0.0, 0.0, 0.25, 2.0])
+    expected = colour.algebra.spow(source, 2.4)
+    result = spow(source, 2.4)
+    numpy.testing.assert_allclose(result, expected)
+    assert result is not source
+
+    result = spow(source, 2.4, out=source)
+    assert result is source
+    numpy.testing.assert_allclose(result, expected)
+
+
+def test_saturation():
+    source = numpy.array([[[0.2, 0.5, 0.8], [1.0, 1.0, 1.0]]])
+    source_copy = source.copy()
+    result = saturation(source, 1.2)
+    # input is not modified anymore
+    numpy.testing.assert_equal(source, source_copy)
+    # greys are not affected
+    numpy.testing.assert_allclose(result[0, 1], [1.0, 1.0, 1.0])
+    luma = numpy.sum(source * (0.2126, 0.7152, 0.0722), axis=-1, keepdims=True)
+    numpy.testing.assert_allclose(result, (source - luma) * 1.2 + luma)
+
+    result2 = saturation(source, 1.2, out=source)
+    assert result2 is source
+    numpy.testing.assert_allclose(result2, result)
@@ -0,0 +1,36 @@
+import functools
+
+import numpy
+
+from AgXLib._hashing import get_content_hash
+
+EXPOSURE = 0.5
+
+
+def _apply_exposure(array):
+    return array * EXPOSURE
+
+
+def test_get_content_hash_globals(monkeypatch):
+    expected = get_content_hash(_apply_exposure)
+    assert get_content_hash(_apply_exposure) == expected
+
+    monkeypatch.setitem(_apply_exposure.__globals__, "EXPOSURE", 2.0)
+    assert get_content_hash(_apply_exposure) != expected
+
+
+def test_get_content_hash_values():
+    array = numpy.arange(6.0)
+    assert get_content_hash(array) == get_content_hash(array.copy())
+    assert get_content_hash(array) != get_content_hash(array.astype(numpy.float32))
+    assert get_content_hash({"a": 1, "b": 2}) == get_content_hash({"b": 2, "a": 1})
+
+    partial = functools.partial(numpy.clip, a_min=0.0)
+    assert get_content_hash(partial) == get_content_hash(
+        functools.partial(numpy.clip, a_min=0.0)
+    )
+    assert get_content_hash(partial) != get_content_hash(
+        functools.partial(numpy.clip, a_min=1.0)
+    )
+
+    assert get_content_hash(numpy.random.default_rng(seed=1).random) is None
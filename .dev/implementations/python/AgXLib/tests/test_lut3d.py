@@ -0,0 +1,171 @@
+import functools
+
+import colour
+import numpy
+
+from AgXLib import AgXPipeline
+from AgXLib import LUT3D
+from AgXLib import bake_AgX_LUT3D
+from AgXLib import convert_open_domain_to_normalized_log2
+from AgXLib.lut3d import _interpolate_tetrahedral
+
+
+def _get_test_image() -> numpy.ndarray:
+    generator = numpy.random.default_rng(seed=5)
+    # open-domain values with some negatives
+    return generator.uniform(-0.1, 12.0, size=(16, 24, 3))
+
+
+def _get_pipeline() -> AgXPipeline:
+    return AgXPipeline(
+        colour.RGB_COLOURSPACES["ITU-R BT.2020"],
+        inset=(0.23, 0.15, 0.35),
+        rotate=(5, 0, -6),
+    )
+
+
+def test_interpolate_tetrahedral():
+    generator = numpy.random.default_rng(seed=2)
+    table = generator.uniform(0.0, 1.0, size=(9, 9, 9, 3))
+    source = generator.uniform(0.0, 1.0, size=(500, 3))
+    # ties between fractions and cube boundaries
+    source[:10] = 0.5
+    source[10:20, 1] = source[10:20, 0]
+    source[20] = 1.0
+    source[21] = 0.0
+
+    expected = colour.algebra.table_interpolation_tetrahedral(source, table)
+    result = numpy.empty_like(source)
+    _interpolate_tetrahedral(source.copy(), table.reshape((-1, 3)), 9, out=result)
+    numpy.testing.assert_allclose(result, expected, rtol=0, atol=1e-15)
+
+
+def test_LUT3D_apply():
+    # a table linear in the shaper space is interpolated exactly
+    samples = numpy.linspace(0.0, 1.0, 5)
+    grid = numpy.stack(numpy.meshgrid(samples, samples, samples, indexing="ij"), -1)
+    lut = LUT3D(table=grid[..., ::-1] * 0.5)
+
+    source = _get_test_image()
+    expected = convert_open_domain_to_normalized_log2(source, clamp=True)[..., ::-1]
+    result = lut.apply(source)
+    numpy.testing.assert_allclose(result, expected * 0.5, atol=1e-15)
+
+    result = lut.apply(source, out=source)
+    assert result is source
+    numpy.testing.assert_allclose(result, expected * 0.5, atol=1e-15)
+
+    # non-contiguous output
+    out = numpy.zeros((16, 24, 4))[..., :3]
+    result = lut.apply(_get_test_image(), out=out)
+    assert result is out
+    numpy.testing.assert_allclose(out, expected * 0.5, atol=1e-15)
+
+
+def test_LUT3D_apply_non_finite():
+    samples = numpy.linspace(0.0, 1.0, 5)
+    grid = numpy.stack(numpy.meshgrid(samples, samples, samples, indexing="ij"), -1)
+    lut = LUT3D(table=grid * 0.5)
+
+    source = _get_test_image()
+    source[0, 0] = [numpy.nan, 1.0, 1.0]
+    source[0, 1] = [numpy.inf, -numpy.inf, 0.18]
+    source[0, 2] = numpy.nan
+    result = lut.apply(source)
+
+    assert numpy.isnan(result[0, 0]).all()
+    assert numpy.isnan(result[0, 2]).all()
+    numpy.testing.assert_allclose(result[0, 1], [0.5, 0.0, 0.5 * 10 / 16.5])
+    assert numpy.isfinite(result[1:]).all()
+    expected = convert_open_domain_to_normalized_log2(source[1:], clamp=True)
+    numpy.testing.assert_allclose(result[1:], expected * 0.5, atol=1e-15)
+
+
+def test_bake_AgX_LUT3D():
+    pipeline = _get_pipeline()
+    lut = bake_AgX_LUT3D(pipeline, size=33)
+    assert lut.size == 33
+    assert not lut.table.flags.writeable
+
+    source = _get_test_image()
+    expected = pipeline.apply(source)
+    result = lut.apply(source)
+    numpy.testing.assert_allclose(result, expected, atol=5e-3)
+
+
+def _count_calls(pipeline: AgXPipeline) -> list:
+    calls = []
+    apply = pipeline.apply
+
+    def counted_apply(array):
+        calls.append(array.shape)
+        return apply(array)
+
+    pipeline.apply = counted_apply
+    return calls
+
+
+def test_bake_AgX_LUT3D_cache(tmp_path):
+    pipeline = _get_pipeline()
+    calls = _count_calls(pipeline)
+
+    def pre_grading(array):
+        return array * 0.8
+
+    lut = bake_AgX_LUT3D(pipeline, size=9, pre_grading=pre_grading, cache_dir=tmp_path)
+    assert len(calls) == 1
+    assert len(list(tmp_path.iterdir())) == 1
+
+    cached = bake_AgX_LUT3D(
+        pipeline, size=9, pre_grading=pre_grading, cache_dir=tmp_path
+    )
+    assert len(calls) == 1
+    numpy.testing.assert_equal(cached.table, lut.table)
+
+    bake_AgX_LUT3D(pipeline, size=9, cache_dir=tmp_path)
+    bake_AgX_LUT3D(pipeline, size=17, pre_grading=pre_grading, cache_dir=tmp_path)
+    assert len(calls) == 3
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def _get_exposure_grading(exposure: float):
+    def grading(array):
+        return array * exposure
+
+    return grading
+
+
+def _apply_exposure(array, exposure=1.0):
+    return array * exposure
+
+
+def test_bake_AgX_LUT3D_cache_key(tmp_path):
+    pipeline = _get_pipeline()
+    calls = _count_calls(pipeline)
+
+    # same code, different captured values
+    bake_AgX_LUT3D(
+        pipeline, size=5, pre_grading=_get_exposure_grading(0.5), cache_dir=tmp_path
+    )
+    bake_AgX_LUT3D(
+        pipeline, size=5, pre_grading=_get_exposure_grading(2.0), cache_dir=tmp_path
+    )
+    bake_AgX_LUT3D(
+        pipeline, size=5, pre_grading=_get_exposure_grading(2.0), cache_dir=tmp_path
+    )
+    assert len(calls) == 2
+
+    # partial objects are identified by their function and arguments
+    for exposure in (0.5, 0.5, 3.0):
+        grading = functools.partial(_apply_exposure, exposure=exposure)
+        bake_AgX_LUT3D(pipeline, size=5, post_grading=grading, cache_dir=tmp_path)
+    assert len(calls) == 4
+    assert len(list(tmp_path.iterdir())) == 4
+
+    # a random generator state can't be hashed, so nothing is cached
+    generator = numpy.random.default_rng(seed=5)
+    bake_AgX_LUT3D(
+        pipeline, size=5, post_grading=generator.permuted, cache_dir=tmp_path
+    )
+    assert len(calls) == 5
+    assert len(list(tmp_path.iterdir())) == 4
@@ -0,0 +1,106 @@
+import xml.etree.ElementTree
+
+import colour
+import numpy
+import pytest
+
+import AgXLib.lut_io
+from AgXLib import write_LUT1D
+from AgXLib import write_LUT3D
+
+
+def _get_table_3d(size: int) -> numpy.ndarray:
+    generator = numpy.random.default_rng(seed=4)
+    return generator.uniform(-0.1, 1.2, size=(size, size, size, 3))
+
+
+@pytest.mark.parametrize("suffix", [".cube", ".spi3d"])
+def test_write_LUT3D_same_as_colour(tmp_path, suffix, monkeypatch):
+    # small chunks to also test rows are written across multiple chunks
+    monkeypatch.setattr(AgXLib.lut_io, "LUT_WRITE_CHUNK_ROWS", 7)
+    table = _get_table_3d(9)
+    comments = ["first comment", "second comment"]
+
+    expected_path = tmp_path / f"expected{suffix}"
+    colour.write_LUT(
+        colour.LUT3D(table, name="test LUT", comments=comments),
+        str(expected_path),
+        decimals=5,
+    )
+    result_path = tmp_path / f"result{suffix}"
+    write_LUT3D(result_path, table, name="test LUT", comments=comments, decimals=5)
+
+    assert result_path.read_text() == expected_path.read_text()
+
+
+@pytest.mark.parametrize("domain", [(0.0, 1.0), (-0.1, 2.0)])
+@pytest.mark.parametrize("channels", [1, 3])
+def test_write_LUT1D_spi1d_same_as_colour(tmp_path, domain, channels):
+    generator = numpy.random.default_rng(seed=4)
+    table = generator.uniform(0.0, 1.0, size=(64, channels)).squeeze()
+    if channels == 1:
+        lut = colour.LUT1D(table, name="test", domain=domain, comments=["comment"])
+    else:
+        domain_3x1 = numpy.array([[domain[0]] * 3, [domain[1]] * 3])
+        lut = colour.LUT3x1D(
+            table, name="test", domain=domain_3x1, comments=["comment"]
+        )
+
+    expected_path = tmp_path / "expected.spi1d"
+    colour.write_LUT(lut, str(expected_path))
+    result_path = tmp_path / "result.spi1d"
+    write_LUT1D(result_path, table, domain=domain, name="test", comments=["comment"])
+
+    assert result_path.read_text() == expected_path.read_text()
+
+
+def test_write_LUT1D_cube(tmp_path):
+    table = numpy.linspace(0.0, 1.0, 16) ** 2.2
+    path = tmp_path / "test.cube"
+    write_LUT1D(path, table, domain=(-0.1, 2.0), name="test")
+
+    lut = colour.read_LUT(str(path))
+    numpy.testing.assert_allclose(
+        lut.table, table[:, numpy.newaxis].repeat(3, 1), atol=1e-7
+    )
+    numpy.testing.assert_allclose(lut.domain, [[-0.1] * 3, [2.0] * 3])
+
+
+def test_write_LUT_clf(tmp_path):
+    table = _get_table_3d(5)
+    path = tmp_path / "test.clf"
+    write_LUT3D(path, table, name="a <test>", comments=["a & b"], decimals=10)
+
+    root = xml.etree.ElementTree.parse(path).getroot()
+    assert root.get("name") == "a <test>"
+    assert root.find("Description").text == "a & b"
+    array = root.find("LUT3D/Array")
+    assert array.get("dim") == "5 5 5 3"
+    values = numpy.array(array.text.split(), dtype=numpy.float64)
+    # blue varies the fastest
+    numpy.testing.assert_allclose(values.reshape(table.shape), table, atol=1e-10)
+
+    table = numpy.linspace(0.0, 1.0, 16)
+    path = tmp_path / "test1d.clf"
+    write_LUT1D(path, table, domain=(-0.1, 2.0))
+    root = xml.etree.ElementTree.parse(path).getroot()
+    assert float(root.find("Range/minInValue").text) == -0.1
+    assert root.find("LUT1D/Array").get("dim") == "16 1"
+
+
+def test_write_LUT_npy(tmp_path):
+    table = _get_table_3d(5).astype(numpy.float32)
+    path = tmp_path / "test.npy"
+    write_LUT3D(path, table)
+    numpy.testing.assert_array_equal(numpy.load(path), table)
+
+
+def test_write_LUT_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        write_LUT3D(tmp_path / "test.spi1d", _get_table_3d(5))
+    with pytest.raises(ValueError):
+        write_LUT3D(tmp_path / "test.cube", numpy.zeros((5, 4, 5, 3)))
+    with pytest.raises(ValueError):
+        write_LUT1D(tmp_path / "test.spi3d", numpy.zeros(5))
+    with pytest.raises(ValueError):
+        write_LUT1D(tmp_path / "test.cube", numpy.zeros((5, 2)))
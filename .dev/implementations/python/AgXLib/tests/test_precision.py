@@ -0,0 +1,58 @@
+import colour
+import numpy
+import pytest
+
+import AgXLib
+from AgXLib import AgXPipeline
+from AgXLib import apply_AgX_tonescale
+from AgXLib import convert_normalized_log2_to_open_domain
+from AgXLib import convert_open_domain_to_normalized_log2
+
+
+@pytest.fixture
+def restore_precision():
+    precision = AgXLib.get_precision()
+    yield
+    AgXLib.set_precision(precision)
+
+
+def test_set_precision(restore_precision):
+    assert AgXLib.get_precision() == numpy.float64
+
+    AgXLib.set_precision("float32")
+    assert AgXLib.get_precision() == numpy.float32
+    source = numpy.linspace(0.0, 1.0, 12, dtype=numpy.float32)
+    assert convert_open_domain_to_normalized_log2(source).dtype == numpy.float32
+    assert convert_normalized_log2_to_open_domain(source).dtype == numpy.float32
+    assert apply_AgX_tonescale(source).dtype == numpy.float32
+    assert apply_AgX_tonescale(source, lut_size=256).dtype == numpy.float32
+
+    with pytest.raises(ValueError):
+        AgXLib.set_precision("float16")
+
+
+def test_precision_per_call():
+    source = numpy.linspace(0.0, 1.0, 12, dtype=numpy.float32)
+    result = apply_AgX_tonescale(source)
+    assert result.dtype == numpy.float64
+    result = apply_AgX_tonescale(source, dtype=numpy.float32)
+    assert result.dtype == numpy.float32
+
+
+def test_float32_accuracy():
+    """
+    float32 computations stay within 1e-6 of float64 ones (in display-referred
+    [0,1] range) for the whole DRT.
+    """
+    generator = numpy.random.default_rng(seed=2)
+    source = generator.uniform(-0.1, 20.0, size=(64, 64, 3))
+    colorspace = colour.RGB_COLOURSPACES["sRGB"]
+
+    pipeline64 = AgXPipeline(colorspace, (0.15, 0.2, 0.1), (5, 0, -6))
+    pipeline32 = AgXPipeline(colorspace, (0.15, 0.2, 0.1), (5, 0, -6), dtype="float32")
+    assert pipeline32.inset_matrix.dtype == numpy.float32
+
+    expected = pipeline64.apply(source)
+    result = pipeline32.apply(source.astype(numpy.float32))
+    assert result.dtype == numpy.float32
+    numpy.testing.assert_allclose(result, expected, atol=1e-6)
@@ -0,0 +1,40 @@
+import json
+
+import colour
+import numpy
+
+from AgXLib import convert_imagery_to_AgX_closeddomain
+from AgXLib.profiling import get_active_profiler
+from AgXLib.profiling import profile_stages
+
+
+def test_profile_stages(tmp_path):
+    source = numpy.full((8, 8, 3), 0.18)
+    colorspace = colour.RGB_COLOURSPACES["sRGB"]
+
+    assert get_active_profiler() is None
+    with profile_stages(trace_memory=True) as profiler:
+        assert get_active_profiler() is profiler
+        convert_imagery_to_AgX_closeddomain(source, colorspace, (0.2,) * 3, (0,) * 3)
+    assert get_active_profiler() is None
+
+    names = [record.name for record in profiler.records]
+    assert names == ["setup", "clip", "inset", "log2", "tonescale", "power"]
+    for record in profiler.records:
+        assert record.duration >= 0.0
+        assert record.allocated_bytes is not None
+    assert profiler.records[-1].shape == (8, 8, 3)
+    assert profiler.records[-1].dtype == "float64"
+
+    as_dict = profiler.as_dict()
+    assert set(as_dict["totals"]) == set(names)
+    json.dumps(as_dict)
+
+    trace_path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(trace_path)
+    trace = json.loads(trace_path.read_text())
+    assert len(trace["traceEvents"]) == len(names)
+
+    # nothing recorded outside the context
+    convert_imagery_to_AgX_closeddomain(source, colorspace, (0.2,) * 3, (0,) * 3)
+    assert len(profiler.records) == len(names)
@@ -0,0 +1,64 @@
+import numpy
+
+import AgXLib
+
+BT709_GAMUT = numpy.array([[0.64, 0.33], [0.3, 0.6], [0.15, 0.06]])
+D65_WHITEPOINT = numpy.array([0.3127, 0.329])
+
+
+def test_get_reshaped_colorspace_matrices():
+    generator = numpy.random.default_rng(seed=3)
+    insets = generator.uniform(0.0, 0.5, size=(16, 3))
+    rotations = generator.uniform(-20.0, 20.0, size=(16, 3))
+
+    result = AgXLib.get_reshaped_colorspace_matrices(
+        BT709_GAMUT,
+        D65_WHITEPOINT,
+        insets,
+        rotations,
+    )
+    assert result.shape == (16, 3, 3)
+
+    for index in range(len(insets)):
+        expected = AgXLib.get_reshaped_colorspace_matrix(
+            BT709_GAMUT,
+            D65_WHITEPOINT,
+            *insets[index],
+            *rotations[index],
+        )
+        numpy.testing.assert_allclose(result[index], expected, rtol=0, atol=1e-12)
+
+
+def test_get_reshaped_colorspace_matrices_single():
+    result = AgXLib.get_reshaped_colorspace_matrices(
+        BT709_GAMUT,
+        D65_WHITEPOINT,
+        [[0.38, 0.3, 0.5]],
+        [[5.0, 0.0, -6.0]],
+    )
+    expected = AgXLib.get_reshaped_colorspace_matrix(
+        BT709_GAMUT, D65_WHITEPOINT, 0.38, 0.3, 0.5, 5.0, 0.0, -6.0
+    )
+    assert result.shape == (1, 3, 3)
+    numpy.testing.assert_allclose(result[0], expected, rtol=0, atol=1e-12)
+
+
+def test_get_reshape_matrices():
+    AgXLib.reshape.clear_reshape_matrices_cache()
+    forward, inverse = AgXLib.get_reshape_matrices(
+        BT709_GAMUT, D65_WHITEPOINT, 0.38, 0.3, 0.5, 5.0, 0.0, -6.0
+    )
+    expected = AgXLib.get_reshaped_colorspace_matrix(
+        BT709_GAMUT, D65_WHITEPOINT, 0.38, 0.3, 0.5, 5.0, 0.0, -6.0
+    )
+    numpy.testing.assert_allclose(forward, expected, rtol=0, atol=1e-12)
+    numpy.testing.assert_allclose(forward @ inverse, numpy.identity(3), atol=1e-12)
+    assert not forward.flags.writeable
+    assert not inverse.flags.writeable
+
+    # tiny float noise in the arguments still hit the cache
+    cached_forward, cached_inverse = AgXLib.get_reshape_matrices(
+        BT709_GAMUT + 1e-14, D65_WHITEPOINT, 0.38, 0.3, 0.5, 5.0, -0.0, -6.0
+    )
+    assert cached_forward is forward
+    assert cached_inverse is inverse
@@ -1,7 +1,12 @@
 import colour
 import numpy
+import pytest
 
 from AgXLib.tonescale import apply_AgX_tonescale
+from AgXLib.tonescale import bake_AgX_tonescale
+from AgXLib.tonescale import invert_AgX_tonescale
+from AgXLib.tonescale import TonescaleParams
+from AgXLib.tonescale import _equation_full_curve
 
 
 def test_apply_AgX_tonescale():
@@ -10,3 +15,177 @@ def test_apply_AgX_tonescale():
     result = apply_AgX_tonescale(source)
     # TODO find why it doesn't pass and 0 doesn't map back to 0
     # numpy.testing.assert_allclose(result, expected)
+
+
+def test_bake_AgX_tonescale():
+    lut = bake_AgX_tonescale(size=4096)
+    assert lut.size == 4096
+    assert lut.max_error < 1e-5
+    # cached per parameters
+    assert bake_AgX_tonescale(size=4096) is lut
+    assert bake_AgX_tonescale(size=4096, general_contrast=2.1) is not lut
+
+    source = numpy.linspace(0.0, 1.0, 1000)
+    expected = apply_AgX_tonescale(source)
+    result = apply_AgX_tonescale(source, lut_size=4096)
+    numpy.testing.assert_allclose(result, expected, atol=lut.max_error)
+
+    lut = bake_AgX_tonescale(size=64, max_error=1e-7)
+    assert lut.size > 64
+    assert lut.max_error <= 1e-7
+    result = apply_AgX_tonescale(source, lut_max_error=1e-7)
+    numpy.testing.assert_allclose(result, expected, atol=1e-7)
+
+    with pytest.raises(ValueError):
+        bake_AgX_tonescale(max_error=0.0)
+    with pytest.raises(ValueError):
+        apply_AgX_tonescale(source, lut_size=0)
+
+
+def test_apply_AgX_tonescale_lut_clamp():
+    source = numpy.array([-1.0, 0.0, 0.5, 1.0, 2.0, numpy.nan])
+    expected = apply_AgX_tonescale(numpy.clip(source, 0.0, 1.0))
+    result = apply_AgX_tonescale(source, lut_size=4096)
+    numpy.testing.assert_allclose(result, expected, atol=1e-6)
+
+    # the computation is performed in the requested precision
+    result = apply_AgX_tonescale(source, lut_size=4096, dtype="float32")
+    assert result.dtype == numpy.float32
+    numpy.testing.assert_allclose(result, expected, atol=1e-6)
+
+
+def test_apply_AgX_tonescale_partitioned():
+    # compare with the reference implementation evaluating both sides of the curve
+    source = numpy.linspace(-0.2, 1.2, 2001).reshape((667, 3))
+    source[0, 0] = numpy.nan
+    x_pivot = numpy.abs(-10.0 / (6.5 - -10.0))
+    expected = _equation_full_curve(
+        source,
+        numpy.asarray(x_pivot),
+        numpy.asarray(0.5),
+        numpy.asarray(2.0),
+        numpy.asarray(3.0),
+        numpy.asarray(3.25),
+    )
+    result = apply_AgX_tonescale(source)
+    assert result.shape == source.shape
+    numpy.testing.assert_allclose(result, expected, rtol=1e-14, atol=1e-15)
+
+    result = apply_AgX_tonescale(numpy.float32(0.5))
+    numpy.testing.assert_allclose(result, expected[333, 1], rtol=1e-6)
+
+
+def test_apply_AgX_tonescale_out():
+    source = numpy.linspace(0.0, 1.0, 300).reshape((100, 3))
+    expected = apply_AgX_tonescale(source)
+    result = apply_AgX_tonescale(source, out=source)
+    assert result is source
+    numpy.testing.assert_equal(result, expected)
+
+    source = numpy.linspace(0.0, 1.0, 300)
+    expected = apply_AgX_tonescale(source, lut_size=1024)
+    out = numpy.empty_like(source)
+    result = apply_AgX_tonescale(source, lut_size=1024, out=out)
+    assert result is out
+    numpy.testing.assert_equal(result, expected)
+
+
+def test_invert_AgX_tonescale():
+    source = numpy.linspace(-0.1, 1.1, 3000).reshape((1000, 3))
+    tonescaled = apply_AgX_tonescale(source)
+    result = invert_AgX_tonescale(tonescaled)
+    numpy.testing.assert_allclose(result, source, rtol=0, atol=1e-9)
+
+    parameters = dict(
+        min_EV=-8.0, max_EV=4.0, general_contrast=1.6, limits_contrast=(2.5, 3.5)
+    )
+    tonescaled = apply_AgX_tonescale(source, **parameters)
+    result = invert_AgX_tonescale(tonescaled, **parameters)
+    numpy.testing.assert_allclose(result, source, rtol=0, atol=1e-9)
+
+    result = invert_AgX_tonescale(tonescaled, out=tonescaled, **parameters)
+    assert result is tonescaled
+    numpy.testing.assert_allclose(result, source, rtol=0, atol=1e-9)
+
+
+def test_invert_AgX_tonescale_lut():
+    lut = bake_AgX_tonescale(size=4096, inverse=True)
+    assert lut is not bake_AgX_tonescale(size=4096)
+    assert lut.samples[0] == pytest.approx(apply_AgX_tonescale(0.0))
+    assert lut.samples[-1] == pytest.approx(apply_AgX_tonescale(1.0))
+
+    source = numpy.linspace(0.0, 1.0, 1000)
+    tonescaled = apply_AgX_tonescale(source)
+    result = invert_AgX_tonescale(tonescaled, lut_max_error=1e-6)
+    numpy.testing.assert_allclose(result, invert_AgX_tonescale(tonescaled), atol=1e-6)
+    numpy.testing.assert_allclose(result, source, atol=1e-6)
+
+
+def test_TonescaleParams():
+    params = TonescaleParams(
+        min_EV=-8.0, max_EV=4.0, general_contrast=1.6, limits_contrast=(2.5, 3.5)
+    )
+    assert params == TonescaleParams(-8, 4, 1.6, [2.5, 3.5])
+    assert params.toe_scale < 0.0 < params.shoulder_scale
+
+    source = numpy.linspace(-0.1, 1.1, 300).reshape((100, 3))
+    expected = apply_AgX_tonescale(
+        source,
+        min_EV=-8.0,
+        max_EV=4.0,
+        general_contrast=1.6,
+        limits_contrast=(2.5, 3.5),
+    )
+    result = apply_AgX_tonescale(source, params=params)
+    numpy.testing.assert_equal(result, expected)
+
+    result = invert_AgX_tonescale(result, params=params)
+    numpy.testing.assert_allclose(result, source, rtol=0, atol=1e-9)
+
+
+def test_apply_AgX_tonescale_per_channel():
+    source = numpy.linspace(-0.1, 1.1, 3000).reshape((1000, 3))
+    general_contrast = (2.0, 1.8, 2.2)
+    limits_contrast = ((3.0, 2.8, 3.1), (3.25, 3.3, 3.0))
+    min_EV = (-10.0, -9.0, -10.5)
+
+    result = apply_AgX_tonescale(
+        source,
+        min_EV=min_EV,
+        general_contrast=general_contrast,
+        limits_contrast=limits_contrast,
+    )
+    for channel in range(3):
+        expected = apply_AgX_tonescale(
+            source[..., channel],
+            min_EV=min_EV[channel],
+            general_contrast=general_contrast[channel],
+            limits_contrast=(limits_contrast[0][channel], limits_contrast[1][channel]),
+        )
+        numpy.testing.assert_equal(result[..., channel], expected)
+
+    # reference implementation broadcasting the parameters
+    min_EV = numpy.array(min_EV)
+    expected = _equation_full_curve(
+        source,
+        numpy.abs(min_EV / (6.5 - min_EV)),
+        numpy.asarray(0.5),
+        numpy.asarray(general_contrast),
+        numpy.asarray(limits_contrast[0]),
+        numpy.asarray(limits_contrast[1]),
+    )
+    numpy.testing.assert_allclose(result, expected, rtol=1e-14, atol=1e-15)
+
+    params = TonescaleParams(general_contrast=general_contrast)
+    assert len(params.channels) == 3
+    result = apply_AgX_tonescale(source, params=params, lut_size=4096)
+    numpy.testing.assert_allclose(
+        invert_AgX_tonescale(result, params=params),
+        numpy.clip(source, 0.0, 1.0),
+        atol=1e-5,
+    )
+
+    with pytest.raises(ValueError):
+        apply_AgX_tonescale(source[..., :2], params=params)
+    with pytest.raises(ValueError):
+        TonescaleParams(general_contrast=(2.0, 2.0))
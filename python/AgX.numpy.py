@@ -3,21 +3,31 @@ AgX from Troy.S as a native python + numpy implementation.
 (shameless "improved" copy of its existing work).
 
 [performances]
-- not suitable for realtime
-- 0.73s of processing for a 1920x1080x3 EXR image
+- ~0.29s of processing for a 1920x1080x3 float32 image (~0.55s in float64),
+  see .dev/implementations/python/AgXLib/benchmarks for up-to-date measures.
+- faster preview approximation with AgXRealtime or applyAgX(realtime=True):
+  ~0.09s for a 1920x1080x3 image, which is NOT enough for 1080p60 playback,
+  only reached on a downsampled preview (AgXRealtime(downsample=3): ~0.01s).
 
 [dependencies]
 python = ">2.7"
 numpy = "*"
 """
-__all__ = ("applyAgX",)
+
+__all__ = ("applyAgX", "AgXRealtime")
 __version__ = "1.1.0"
 __author__ = "Liam Collod <monsieurlixm@gmail.com>"
 
+import collections
+import hashlib
+import inspect
+import os
+import sys
+
 import numpy
 
 try:  # python 2 compatibility. Only used in type hints.
-    from typing import List, Union, Tuple
+    from typing import List, Optional, Union, Tuple
 except ImportError:
     pass
 
@@ -66,9 +76,9 @@ def saturate(
         input array with the given saturation value applied
     """
 
-    luma = array * coefs
-    luma = numpy.sum(luma, axis=2)
-    luma = numpy.stack((luma,) * 3, axis=-1)
+    # single luma plane broadcast over the channels
+    luma = numpy.dot(array, numpy.asarray(coefs, dtype=array.dtype))
+    luma = luma[..., numpy.newaxis]
 
     array -= luma
     array *= saturation
@@ -153,24 +163,18 @@ def equation_full_curve(lut_array, x_pivot, y_pivot, slope_pivot, power):
         x_pivot:
         y_pivot:
         slope_pivot:
-        power:
+        power: toe and shoulder power
 
     Returns:
 
     """
-    lut_size = len(lut_array)
-
-    x_pivot = numpy.tile(numpy.asarray(x_pivot), lut_size)
-    y_pivot = numpy.tile(numpy.asarray(y_pivot), lut_size)
-    slope_pivot = numpy.tile(numpy.asarray(slope_pivot), lut_size)
-    power = numpy.tile(numpy.asarray(power), lut_size)
+    power = numpy.asarray(power)
 
-    scale_x_pivot = numpy.where(lut_array >= x_pivot, 1.0 - x_pivot, x_pivot)
-    scale_y_pivot = numpy.where(lut_array >= x_pivot, 1.0 - y_pivot, y_pivot)
-
-    toe_scale = equation_scale(scale_x_pivot, scale_y_pivot, slope_pivot, power[..., 0])
+    # scales only depend on the side of the pivot so are computed once per side
+    # and not per value.
+    toe_scale = equation_scale(x_pivot, y_pivot, slope_pivot, power[..., 0])
     shoulder_scale = equation_scale(
-        scale_x_pivot, scale_y_pivot, slope_pivot, power[..., 1]
+        1.0 - x_pivot, 1.0 - y_pivot, slope_pivot, power[..., 1]
     )
 
     scale = numpy.where(lut_array >= x_pivot, shoulder_scale, -toe_scale)
@@ -178,34 +182,219 @@ def equation_full_curve(lut_array, x_pivot, y_pivot, slope_pivot, power):
     return equation_curve(lut_array, x_pivot, y_pivot, slope_pivot, power, scale)
 
 
-def generateAgxLut(size=4096):
-    # type: (int) -> numpy.ndarray
+def generateAgxLut(
+    size=4096,
+    min_ev=-10.0,
+    max_ev=+6.5,
+    general_contrast=2.0,
+    limits_contrast=(3.0, 3.25),
+    power=1.0,
+):
+    # type: (int, float, float, float, Tuple[float, float], float) -> numpy.ndarray
     """
     Ready to encode array for .spi1d LUT.
 
+    Prefer using getAgxLut() that cache the result.
+
     Args:
         size: LUT size to generate
+        min_ev:
+        max_ev:
+        general_contrast:
+        limits_contrast:
+        power:
+            cdlPower() applied on the LUT values, which allow to fold a power
+            following the tonescale (like the Punchy look) in the LUT. The same
+            power is used for all channels as the LUT is shared by all of them.
     """
     lut_array = numpy.linspace(0.0, 1.0, size)
 
-    AgX_min_EV = -10.0
-    AgX_max_EV = +6.5
+    AgX_min_EV = min_ev
+    AgX_max_EV = max_ev
     AgX_x_pivot = numpy.abs(AgX_min_EV / (AgX_max_EV - AgX_min_EV))
     AgX_y_pivot = 0.50
 
-    general_contrast = 2.0
-    limits_contrast = [3.0, 3.25]
-
     y_LUT = equation_full_curve(
         lut_array,
         AgX_x_pivot,
         AgX_y_pivot,
         general_contrast,
-        limits_contrast,
+        list(limits_contrast),
     )
+    if power != 1.0:
+        y_LUT = cdlPower(y_LUT, power)
     return y_LUT
 
 
+LUT_CACHE_SIZE = 8
+"""
+Maximum number of LUTs kept in memory by getAgxLut(). Least recently used are
+discarded first.
+"""
+
+LUT_CACHE_DIR = os.environ.get("AGX_LUT_CACHE_DIR")
+"""
+Optional directory where getAgxLut() persists the LUTs it generates, so they can be
+reused by other processes. Default to the AGX_LUT_CACHE_DIR environment variable.
+
+LUTs are written in an "AgX.numpy" subdirectory, as the directory can be shared
+with the AgXLib caches.
+"""
+
+_lut_cache = collections.OrderedDict()  # type: collections.OrderedDict
+
+
+def clearLutCache(disk=False):
+    # type: (bool) -> None
+    """
+    Discard all the LUTs cached in memory by getAgxLut().
+
+    Args:
+        disk: if True also delete the LUTs persisted in LUT_CACHE_DIR.
+    """
+    _lut_cache.clear()
+    cache_dir = _getLutCacheDir()
+    if not disk or not cache_dir or not os.path.isdir(cache_dir):
+        return
+    for filename in os.listdir(cache_dir):
+        if filename.startswith("AgX-lut-") and filename.endswith(".npy"):
+            os.remove(os.path.join(cache_dir, filename))
+
+
+clear_cache = clearLutCache
+
+
+def _makeDirs(path):
+    # type: (str) -> None
+    # python 2 compatible os.makedirs(path, exist_ok=True)
+    if os.path.isdir(path):
+        return
+    try:
+        os.makedirs(path)
+    except OSError:
+        # created by another process in the meantime
+        if not os.path.isdir(path):
+            raise
+
+
+def _replaceFile(src_path, dst_path):
+    # type: (str, str) -> None
+    # python 2 compatible os.replace()
+    replace = getattr(os, "replace", None)
+    if replace is not None:
+        replace(src_path, dst_path)
+        return
+    try:
+        os.rename(src_path, dst_path)
+    except OSError:
+        # XXX: on Windows rename fails if the destination exists
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        os.rename(src_path, dst_path)
+
+
+_source_hash = None  # type: Optional[str]
+
+
+def _getSourceHash():
+    # type: () -> Optional[str]
+    """
+    Hash of the source code of this file, so editing the curve doesn't reuse the
+    LUTs generated before. None if the source can't be found.
+    """
+    global _source_hash
+    if _source_hash is not None:
+        return _source_hash or None
+
+    source = None
+    try:
+        with open(__file__, "rb") as source_file:
+            source = source_file.read()
+    except (IOError, OSError, NameError):
+        try:
+            source = inspect.getsource(sys.modules[__name__]).encode("utf-8")
+        except (IOError, OSError, TypeError, KeyError):
+            pass
+
+    # empty string mark the source as not found without searching for it again
+    _source_hash = hashlib.sha1(source).hexdigest() if source else ""
+    return _source_hash or None
+
+
+def _getLutCacheDir():
+    # type: () -> Optional[str]
+    if not LUT_CACHE_DIR:
+        return None
+    return os.path.join(LUT_CACHE_DIR, "AgX.numpy")
+
+
+def _getLutCachePath(key):
+    # type: (tuple) -> Optional[str]
+    """
+    Returns:
+        path of the file the LUT is persisted to, None if it must not be persisted.
+    """
+    cache_dir = _getLutCacheDir()
+    source_hash = _getSourceHash()
+    if not cache_dir or not source_hash:
+        return None
+    # the source is part of the hash so an edit doesn't use outdated LUTs
+    key_hash = hashlib.sha1(repr((source_hash,) + key).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "AgX-lut-{}.npy".format(key_hash[:16]))
+
+
+def getAgxLut(
+    size=4096,
+    min_ev=-10.0,
+    max_ev=+6.5,
+    general_contrast=2.0,
+    limits_contrast=(3.0, 3.25),
+    power=1.0,
+):
+    # type: (int, float, float, float, Tuple[float, float], float) -> numpy.ndarray
+    """
+    Same as generateAgxLut() but the LUT is only generated once per parameters and
+    then cached in memory (and on disk if LUT_CACHE_DIR is set).
+
+    Returns:
+        read-only LUT array.
+    """
+    key = (
+        int(size),
+        float(min_ev),
+        float(max_ev),
+        float(general_contrast),
+        tuple(float(contrast) for contrast in limits_contrast),
+        float(power),
+    )
+    lut = _lut_cache.pop(key, None)
+
+    cache_path = _getLutCachePath(key)
+    if lut is None and cache_path and os.path.exists(cache_path):
+        try:
+            lut = numpy.load(cache_path)
+        except (IOError, OSError, ValueError):
+            lut = None
+
+    if lut is None:
+        lut = generateAgxLut(*key)
+        if cache_path:
+            _makeDirs(os.path.dirname(cache_path))
+            # write then rename so concurrent processes never read a partial file
+            tmp_path = "{}.{}.tmp".format(cache_path, os.getpid())
+            with open(tmp_path, "wb") as tmp_file:
+                numpy.save(tmp_file, lut)
+            _replaceFile(tmp_path, cache_path)
+
+    lut.flags.writeable = False
+    # re-inserting mark the LUT as the most recently used
+    _lut_cache[key] = lut
+    while len(_lut_cache) > LUT_CACHE_SIZE:
+        _lut_cache.popitem(last=False)
+
+    return lut
+
+
 def convertOpenDomainToNormalizedLog2(
     in_od,
     minimum_ev=-10.0,
@@ -250,68 +439,247 @@ def applyAgxLog(array):
     return logarray
 
 
-def applyAgxLut(array):
-    # type: (numpy.ndarray) -> numpy.ndarray
+def interpolateUniformLut(array, lut, out=None):
+    # type: (numpy.ndarray, numpy.ndarray, Optional[numpy.ndarray]) -> numpy.ndarray
     """
-    Convert log data to AgX Base.
+    Linear interpolation of a 1D LUT uniformly sampled on the [0,1] domain, with
+    linear extrapolation outside of it.
 
-    Credits to colour-science python library for implementation.
+    The LUT is directly indexed, which is much faster than searching the LUT
+    samples or masking the values outside the domain.
 
     Args:
-        array: AgX log encoded
+        array: values to interpolate, of any shape.
+        lut: 1D LUT values, uniformly sampled on [0,1]
+        out:
+            optional array to write the result in, can be ``array`` for in-place.
+            Computation are performed in its dtype.
 
     Returns:
-        AgX Base encode, ready for display on sRGB monitor.
+        new array of the same shape and dtype than ``array``, or ``out`` if provided.
     """
-    lut = generateAgxLut()
-    lut_size = len(lut)
-    samples = numpy.linspace(0, 1.0, lut_size)
+    if out is None:
+        out = numpy.empty(array.shape, dtype=numpy.result_type(array, numpy.float32))
+
+    lut = lut.astype(out.dtype, copy=False)
+    slopes = numpy.diff(lut)
+    last_index = len(lut) - 2
+
+    # position of each value in the LUT
+    numpy.multiply(array, last_index + 1, out=out)
+    index = numpy.floor(out)
+    # clipping the index means values outside the domain use the slope of the
+    # first or last interval, which is a linear extrapolation.
+    numpy.clip(index, 0, last_index, out=index)
+    numpy.subtract(out, index, out=out)
+    # XXX: NaN create invalid index, mode="clip" below makes them harmless (result is NaN)
+    with numpy.errstate(invalid="ignore"):
+        index = index.astype(numpy.intp)
+
+    out *= slopes.take(index, mode="clip")
+    out += lut.take(index, mode="clip")
+    return out
 
-    def interpolate(x):
-        # type: (numpy.ndarray) -> numpy.ndarray
-        """
-        SRC: https://github.com/colour-science/colour/blob/develop/colour/algebra/interpolation.py#L921
-        """
-        return numpy.interp(x, samples, lut)
 
-    def extrapolate(x):
-        # type: (numpy.ndarray) -> numpy.ndarray
-        """
-        SRC: https://github.com/colour-science/colour/blob/develop/colour/algebra/extrapolation.py#L313
-        """
-        xi = samples
-        yi = lut
-        y = numpy.empty_like(x)
-        # linear method
-        y[x < xi[0]] = yi[0] + (x[x < xi[0]] - xi[0]) * (yi[1] - yi[0]) / (
-            xi[1] - xi[0]
-        )
-        y[x > xi[-1]] = yi[-1] + (x[x > xi[-1]] - xi[-1]) * (yi[-1] - yi[-2]) / (
-            xi[-1] - xi[-2]
-        )
+def applyAgxLut(array, out=None, power=1.0):
+    # type: (numpy.ndarray, Optional[numpy.ndarray], float) -> numpy.ndarray
+    """
+    Convert log data to AgX Base.
+
+    Args:
+        array: AgX log encoded
+        out: optional array to write the result in, can be ``array`` for in-place.
+        power:
+            cdlPower() to apply after the tonescale, folded in the LUT so
+            it costs nothing.
+
+    Returns:
+        AgX Base encode, ready for display on sRGB monitor.
+    """
+    return interpolateUniformLut(array, getAgxLut(power=power), out=out)
 
-        in_range = numpy.logical_and(x >= xi[0], x <= xi[-1])
-        y[in_range] = interpolate(x[in_range])
-        return y
 
-    return extrapolate(array)
+PUNCHY_GAMMA = 1.3
+PUNCHY_SATURATION = 1.2
 
 
-def applyLookPunchy(array, punchy_gamma=1.3, punchy_saturation=1.2):
-    # type: (numpy.ndarray, float, float) -> numpy.ndarray
+def applyLookPunchy(
+    array,
+    punchy_gamma=PUNCHY_GAMMA,
+    punchy_saturation=PUNCHY_SATURATION,
+    out=None,
+):
+    # type: (numpy.ndarray, float, float, Optional[numpy.ndarray]) -> numpy.ndarray
     """
-    Initally an OCIO CDLTransform.
+    Convert log data to AgX Base with the Punchy look applied.
+
+    Initally an OCIO CDLTransform applied on AgX Base. The gamma is folded in the
+    AgX LUT so only the saturation is an additional pass.
 
     SRC: /src/OpenColorIO/ops/cdl/CDLOpCPU.cpp#L348
     "default style is CDL_NO_CLAMP"
+
+    Args:
+        array: AgX log encoded
+        punchy_gamma:
+        punchy_saturation:
+        out: optional array to write the result in, can be ``array`` for in-place.
+
+    Returns:
+        AgX Punchy encoded, ready for display on sRGB monitor.
     """
-    # gamma
-    array = cdlPower(array, punchy_gamma)
+    array = applyAgxLut(array, out=out, power=punchy_gamma)
     array = saturate(array, saturation=punchy_saturation)
-
     return array
 
 
+# --------------------------------------------------------------------------------------
+# Realtime (preview)
+# --------------------------------------------------------------------------------------
+
+
+class AgXRealtime(object):
+    """
+    Apply a fast approximation of the AgX Punchy view-transform, for interactive
+    preview.
+
+    XXX: at full resolution this is about 3x faster than applyAgX() but still
+      doesn't fit the ~16ms budget of 1080p60 (~90ms per 1080p frame on a single
+      core). Only a downsampled preview does, like ``downsample=3`` (640x360 for
+      a 1080p source, ~10ms).
+
+    Everything happening per channel (log encoding, tonescale, punchy gamma) is
+    baked once into a single 1D LUT indexed by the float32 bits of the value (its
+    exponent and first mantissa bits), which is equivalent to a log2 shaper for free.
+    The punchy saturation is a simple 3x3 matrix. All buffers are allocated once
+    per image shape and reused.
+
+    The processed image is returned in a buffer that is overwritten by the next call.
+
+    Args:
+        bitdepth:
+            numpy.uint8, numpy.uint16 to quantize the output in [0, max] range,
+            or numpy.float32 to not quantize it.
+        table_bits:
+            number of mantissa bits used to index the LUT. Each increment double the
+            LUT size and halve the error (~0.0001 for the default 12).
+        punchy_gamma:
+        punchy_saturation:
+        downsample:
+            only process every n-th pixel in height and width, the output is then
+            smaller than the input. 1 to process the full resolution.
+    """
+
+    def __init__(
+        self,
+        bitdepth=numpy.uint8,  # type: type
+        table_bits=12,  # type: int
+        punchy_gamma=PUNCHY_GAMMA,  # type: float
+        punchy_saturation=PUNCHY_SATURATION,  # type: float
+        downsample=1,  # type: int
+    ):
+        self.bitdepth = numpy.dtype(bitdepth)
+        if downsample < 1:
+            raise ValueError("downsample must be >= 1, got {}".format(downsample))
+        self.downsample = int(downsample)
+
+        min_ev = -10.0
+        max_ev = +6.5
+        # values outside this range are clipped by the log encoding anyway
+        self._minimum = numpy.float32(0.18 * 2**min_ev)
+        self._maximum = numpy.float32(0.18 * 2**max_ev)
+
+        self._shift = 23 - table_bits
+        minimum_bits = int(numpy.array(self._minimum).view(numpy.uint32))
+        maximum_bits = int(numpy.array(self._maximum).view(numpy.uint32))
+        self._offset = minimum_bits >> self._shift
+
+        # evaluate each LUT entry at the center of the float interval it covers
+        indexes = numpy.arange(
+            self._offset,
+            (maximum_bits >> self._shift) + 1,
+            dtype=numpy.uint32,
+        )
+        samples = (indexes << self._shift) | (1 << (self._shift - 1))
+        samples = samples.view(numpy.float32).clip(self._minimum, self._maximum)
+        table = convertOpenDomainToNormalizedLog2(
+            samples.astype(numpy.float64),
+            minimum_ev=min_ev,
+            maximum_ev=max_ev,
+        )
+        table = applyAgxLut(table.clip(0.0, 1.0))
+        table = cdlPower(table, punchy_gamma)
+        self.table = table.astype(numpy.float32)  # type: numpy.ndarray
+
+        coefs = numpy.asarray((0.2126, 0.7152, 0.0722))
+        saturation_matrix = punchy_saturation * numpy.identity(3)
+        saturation_matrix += (1.0 - punchy_saturation) * coefs[numpy.newaxis, :]
+        if self.bitdepth.kind == "u":
+            # the quantization scale is free when merged in the matrix
+            saturation_matrix *= numpy.iinfo(self.bitdepth).max
+        # transposed as it is applied on row vectors
+        self._saturation_matrix = saturation_matrix.T.astype(numpy.float32)
+        self._agx_matrix = agx_compressed_matrix.T.copy()
+
+        self._shape = None  # type: Optional[Tuple[int, ...]]
+        self._buffer_a = None  # type: Optional[numpy.ndarray]
+        self._buffer_b = None  # type: Optional[numpy.ndarray]
+        self._indexes = None  # type: Optional[numpy.ndarray]
+        self._output = None  # type: Optional[numpy.ndarray]
+
+    def _allocate(self, shape):
+        # type: (Tuple[int, ...]) -> None
+        pixels = int(numpy.prod(shape[:-1]))
+        self._shape = shape
+        self._buffer_a = numpy.empty((pixels, 3), dtype=numpy.float32)
+        self._buffer_b = numpy.empty((pixels, 3), dtype=numpy.float32)
+        self._indexes = numpy.empty((pixels, 3), dtype=numpy.intp)
+        self._output = numpy.empty(shape, dtype=self.bitdepth)
+
+    def __call__(self, array):
+        # type: (numpy.ndarray) -> numpy.ndarray
+        """
+        Args:
+            array:
+                linear - sRGB image data as R-G-B, any float dtype. Must be of shape
+                (height, width, 3) if downsampled.
+
+        Returns:
+            display-ready array encoded for sRGB SDR monitors, overwritten on next call.
+        """
+        if self.downsample > 1:
+            array = array[:: self.downsample, :: self.downsample]
+        if array.shape != self._shape:
+            self._allocate(array.shape)
+
+        buffer_a = self._buffer_a
+        buffer_b = self._buffer_b
+        indexes = self._indexes
+
+        numpy.maximum(array.reshape((-1, 3)), 0.0, out=buffer_b)
+        numpy.matmul(buffer_b, self._agx_matrix, out=buffer_a)
+        numpy.clip(buffer_a, self._minimum, self._maximum, out=buffer_a)
+
+        numpy.right_shift(buffer_a.view(numpy.uint32), self._shift, out=indexes)
+        numpy.subtract(indexes, self._offset, out=indexes)
+        numpy.take(self.table, indexes, out=buffer_b, mode="clip")
+
+        output = self._output.reshape((-1, 3))
+        if self.bitdepth.kind != "u":
+            numpy.matmul(buffer_b, self._saturation_matrix, out=output)
+            return self._output
+
+        numpy.matmul(buffer_b, self._saturation_matrix, out=buffer_a)
+        # +0.5 so the truncation of the cast is a rounding
+        numpy.add(buffer_a, 0.5, out=buffer_a)
+        numpy.clip(buffer_a, 0.0, numpy.iinfo(self.bitdepth).max, out=buffer_a)
+        numpy.copyto(output, buffer_a, casting="unsafe")
+        return self._output
+
+
+_realtime_processor = None  # type: Optional[AgXRealtime]
+
+
 # --------------------------------------------------------------------------------------
 # Public
 # --------------------------------------------------------------------------------------
@@ -325,8 +693,8 @@ def customLook1(array):
     return array
 
 
-def applyAgX(array):
-    # type: (numpy.ndarray) -> numpy.ndarray
+def applyAgX(array, profiler=None, realtime=False):
+    # type: (numpy.ndarray, Optional[object], bool) -> numpy.ndarray
     """
     -> take linear - sRGB image data as input
     - apply custom grading if any
@@ -335,13 +703,39 @@ def applyAgX(array):
 
     Args:
         array: float32 array, R-G-B format, sRGB Display
+        profiler:
+            optional object to record the duration of each stage. Must have a
+            ``start()`` method and a ``lap(stage_name, array)`` method called at the
+            end of each stage, like ``AgXLib.profiling.StageProfiler``.
+        realtime:
+            if True use a faster approximation of the view-transform intended for
+            preview, see AgXRealtime. The returned float32 array is then overwritten by the
+            next call. Use AgXRealtime directly for quantized output.
     """
+    global _realtime_processor
+
+    if profiler:
+        profiler.start()
 
     # Apply Grading
     array = customLook1(array)
+    if profiler:
+        profiler.lap("grading", array)
+
+    if realtime:
+        if _realtime_processor is None:
+            _realtime_processor = AgXRealtime(bitdepth=numpy.float32)
+        array = _realtime_processor(array)
+        if profiler:
+            profiler.lap("realtime", array)
+        return array
     array = applyAgxLog(array)
-    array = applyAgxLut(array)  # AgX Base
-    array = applyLookPunchy(array=array)
+    if profiler:
+        profiler.lap("log", array)
+    # AgX Base with the Punchy look
+    array = applyLookPunchy(array, out=array)
+    if profiler:
+        profiler.lap("tonescale+punchy", array)
     # Ready for display.
     return array
 
@@ -362,6 +756,15 @@ if __name__ == "__main__":
     new_img = applyAgX(image)
     print("[__main__] image processed in {}s".format(time.time() - s_time))
 
+    realtime_processor = AgXRealtime(bitdepth=numpy.uint8)
+    realtime_processor(image)  # allocate buffers
+    frames = 120
+    s_time = time.time()
+    for _ in range(frames):
+        realtime_processor(image)
+    fps = frames / (time.time() - s_time)
+    print("[__main__] preview processing at {:.1f} FPS".format(fps))
+
     target_path = Path("./agx-test.jpg").absolute()
     print("[__main__] Writing image {} to {}".format(new_img.shape, target_path))
     liio.io.write.writeToArray(
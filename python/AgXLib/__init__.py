@@ -1,8 +1,81 @@
-from .reshape import get_reshaped_colorspace_matrix
-from .tonescale import apply_AgX_tonescale
-from .cctf import convert_open_domain_to_normalized_log2
-from .cctf import convert_normalized_log2_to_open_domain
-from .apply import convert_imagery_to_AgX_closeddomain
-from . import grading
+"""
+Submodules are only imported on first access of one of their attribute, so
+importing AgXLib stays cheap.
+"""
+
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from .reshape import get_reshaped_colorspace_matrix
+    from .reshape import get_reshaped_colorspace_matrices
+    from .reshape import get_reshape_matrices
+    from .tonescale import apply_AgX_tonescale
+    from .tonescale import bake_AgX_tonescale
+    from .tonescale import invert_AgX_tonescale
+    from .tonescale import TonescaleParams
+    from .cctf import convert_open_domain_to_normalized_log2
+    from .cctf import convert_normalized_log2_to_open_domain
+    from .apply import convert_imagery_to_AgX_closeddomain
+    from .apply import AgXPipeline
+    from .lut3d import bake_AgX_LUT3D
+    from .lut3d import LUT3D
+    from .lut_io import write_LUT1D
+    from .lut_io import write_LUT3D
+    from .precision import set_precision
+    from .precision import get_precision
+    from . import grading
+    from . import profiling
 
 __version__ = "0.2.0"
+
+_LAZY_ATTRIBUTES: dict[str, str] = {
+    "get_reshaped_colorspace_matrix": ".reshape",
+    "get_reshaped_colorspace_matrices": ".reshape",
+    "get_reshape_matrices": ".reshape",
+    "apply_AgX_tonescale": ".tonescale",
+    "bake_AgX_tonescale": ".tonescale",
+    "invert_AgX_tonescale": ".tonescale",
+    "TonescaleParams": ".tonescale",
+    "convert_open_domain_to_normalized_log2": ".cctf",
+    "convert_normalized_log2_to_open_domain": ".cctf",
+    "convert_imagery_to_AgX_closeddomain": ".apply",
+    "AgXPipeline": ".apply",
+    "bake_AgX_LUT3D": ".lut3d",
+    "LUT3D": ".lut3d",
+    "write_LUT1D": ".lut_io",
+    "write_LUT3D": ".lut_io",
+    "set_precision": ".precision",
+    "get_precision": ".precision",
+}
+"""
+public attribute name: submodule defining it
+"""
+
+_LAZY_SUBMODULES = ("grading", "profiling")
+
+__all__ = list(_LAZY_ATTRIBUTES) + list(_LAZY_SUBMODULES)
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        # any submodule is accessible as an attribute, like with a regular import
+        try:
+            return importlib.import_module(f".{name}", __name__)
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # cache it so __getattr__ is only called once per attribute
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
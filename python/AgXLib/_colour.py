@@ -0,0 +1,80 @@
+"""
+Pure numpy implementation of the few colour-science functions AgXLib relies on,
+so colour-science (slow to import) is not needed to use the library.
+
+Results are the same as the colour-science functions of the same name.
+"""
+
+import logging
+from typing import Optional
+
+import numpy
+
+from ._types import Ndarray
+
+LOGGER = logging.getLogger(__name__)
+
+
+def xy_to_XYZ(xy: Ndarray) -> Ndarray:
+    """
+    Convert CIExy chromaticity coordinates to CIEXYZ with Y=1.
+
+    Args:
+        xy: coordinates as shape=(...,2).
+
+    Returns:
+        coordinates as shape=(...,3).
+    """
+    x = xy[..., 0]
+    y = xy[..., 1]
+    return numpy.stack([x / y, numpy.ones_like(x), (1.0 - x - y) / y], axis=-1)
+
+
+def normalised_primary_matrix(primaries: Ndarray, whitepoint: Ndarray) -> Ndarray:
+    """
+    Compute the matrix converting RGB values of the given colorspace to CIEXYZ.
+
+    Vectorised: many gamuts sharing the same whitepoint can be given at once.
+
+    Args:
+        primaries: gamut CIExy coordinates as shape=(...,3,2).
+        whitepoint: whitepoint CIExy coordinates as shape=(2,).
+
+    Returns:
+        normalised primary matrices as shape=(...,3,3).
+    """
+    primaries = numpy.asarray(primaries, dtype=numpy.float64)
+    whitepoint = numpy.asarray(whitepoint, dtype=numpy.float64)
+
+    # columns are the XYZ (with Y=1) of each primary
+    primaries_XYZ = numpy.swapaxes(xy_to_XYZ(primaries), -1, -2)
+    whitepoint_XYZ = numpy.broadcast_to(xy_to_XYZ(whitepoint), primaries_XYZ.shape[:-1])
+    coefficients = numpy.linalg.solve(primaries_XYZ, whitepoint_XYZ[..., numpy.newaxis])
+    return primaries_XYZ * numpy.swapaxes(coefficients, -1, -2)
+
+
+def matrix_dot(a: Ndarray, b: Ndarray) -> Ndarray:
+    """
+    Dot product of 2 (stacks of) 3x3 matrices.
+    """
+    return numpy.matmul(a, b)
+
+
+def vector_dot(
+    matrix: Ndarray, array: Ndarray, out: Optional[Ndarray] = None
+) -> Ndarray:
+    """
+    Dot product of a 3x3 matrix with an array of R-G-B vectors.
+
+    Args:
+        matrix: 3x3 matrix
+        array: vectors as shape=(...,3), or single channel values that are broadcast
+            to R-G-B like colour-science does.
+        out: optional array to write the result in, must not share memory with array.
+
+    Returns:
+        new array of shape=(...,3), or ``out`` if provided.
+    """
+    if array.shape[-1] == 3:
+        return numpy.matmul(array, matrix.T, out=out)
+    return numpy.einsum("...ij,...j->...i", matrix, array, out=out)
@@ -0,0 +1,256 @@
+"""
+Hash the content of python objects, including the code of functions and everything
+they depend on, to identify the result of a computation across processes.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import logging
+import platform
+import sys
+import sysconfig
+import types
+from pathlib import Path
+from typing import Any
+from typing import Optional
+
+import numpy
+
+LOGGER = logging.getLogger(__name__)
+
+_PRIMITIVES = (type(None), bool, int, float, complex, str, bytes)
+
+
+class UnhashableError(ValueError):
+    """
+    Raised when the content of an object cannot be identified reliably.
+    """
+
+
+@functools.lru_cache(maxsize=1)
+def get_library_hash() -> str:
+    """
+    Get a hash of the source code of AgXLib, so any change to the library
+    invalidate the results computed with it.
+    """
+    hasher = hashlib.sha1()
+    package_dir = Path(__file__).parent
+    for path in sorted(package_dir.rglob("*.py")):
+        hasher.update(path.relative_to(package_dir).as_posix().encode("utf-8"))
+        hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+def _is_stdlib_path(path: Path) -> bool:
+    paths = {key: Path(value).resolve() for key, value in sysconfig.get_paths().items()}
+    return path.is_relative_to(paths["stdlib"]) and not any(
+        path.is_relative_to(paths[key]) for key in ("purelib", "platlib")
+    )
+
+
+def _get_version(module_name: str) -> Optional[str]:
+    """
+    Get the version of the distribution the given module belongs to, None if it
+    doesn't have one (like scripts, or modules of the current project).
+    """
+    top_name = module_name.partition(".")[0]
+    if top_name in sys.builtin_module_names:
+        return platform.python_version()
+
+    package = sys.modules.get(top_name)
+    version = getattr(package, "__version__", None)
+    if version is not None:
+        return str(version)
+
+    path = getattr(package, "__file__", None)
+    if path and _is_stdlib_path(Path(path).resolve()):
+        return platform.python_version()
+    return None
+
+
+def _is_importable(value: Any) -> bool:
+    """
+    Check if the given object can be retrieved from its module by its name.
+    """
+    found = sys.modules.get(getattr(value, "__module__", None) or "")
+    for name in str(getattr(value, "__qualname__", "<>")).split("."):
+        found = getattr(found, name, None)
+    return found is value
+
+
+def _update_hash_with_code(hasher, code: types.CodeType) -> set[str]:
+    """
+    Hash the bytecode without its line numbers and file name, so moving a function
+    around doesn't change its hash.
+
+    Returns:
+        names of the globals/attributes the code and its nested code refer to.
+    """
+    hasher.update(code.co_code)
+    hasher.update(repr(code.co_names).encode("utf-8"))
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_update_hash_with_code(hasher, const))
+        else:
+            hasher.update(repr(const).encode("utf-8"))
+    return names
+
+
+def _update_hash_with_external(hasher, module_name: Optional[str], name: str) -> bool:
+    """
+    Identify objects of AgXLib or of a versioned package by their name only, their
+    code being part of the library hash or the package version.
+
+    Returns:
+        True if the object was hashed.
+    """
+    # like the methods generated by dataclasses
+    if module_name is None:
+        return False
+
+    if module_name.partition(".")[0] == __name__.partition(".")[0]:
+        hasher.update(f"{module_name}.{name}:{get_library_hash()}".encode("utf-8"))
+        return True
+
+    version = _get_version(module_name)
+    if version is None:
+        return False
+    hasher.update(f"{module_name}.{name}:{version}".encode("utf-8"))
+    return True
+
+
+def update_content_hash(hasher, value: Any, _seen: Optional[dict[int, int]] = None):
+    """
+    Hash the given value and, for functions, everything they depend on: their
+    bytecode, the globals they refer to, their closure and defaults.
+
+    Objects from AgXLib or from packages with a version are identified by their name
+    and version instead of their content.
+
+    Raises:
+        UnhashableError: if the value contains objects whose content can't be hashed.
+    """
+    if _seen is None:
+        _seen = {}
+
+    if isinstance(value, _PRIMITIVES):
+        hasher.update(f"{type(value).__name__}:{value!r}".encode("utf-8"))
+        return
+
+    if isinstance(value, numpy.ndarray):
+        hasher.update(f"ndarray:{value.dtype}:{value.shape}".encode("utf-8"))
+        hasher.update(numpy.ascontiguousarray(value).tobytes())
+        return
+
+    # XXX: objects are identified by their order of visit to support cycles
+    if id(value) in _seen:
+        hasher.update(f"seen:{_seen[id(value)]}".encode("utf-8"))
+        return
+    _seen[id(value)] = len(_seen)
+
+    if isinstance(value, (tuple, list)):
+        hasher.update(f"{type(value).__name__}:{len(value)}".encode("utf-8"))
+        for item in value:
+            update_content_hash(hasher, item, _seen)
+
+    elif isinstance(value, (dict, set, frozenset)):
+        # the order is not stable across processes, so each item is hashed apart
+        items = value.items() if isinstance(value, dict) else value
+        digests = []
+        for item in items:
+            item_hasher = hashlib.sha1()
+            update_content_hash(item_hasher, item, _seen)
+            digests.append(item_hasher.hexdigest())
+        hasher.update(f"{type(value).__name__}:{sorted(digests)}".encode("utf-8"))
+
+    elif isinstance(value, types.ModuleType):
+        if not _update_hash_with_external(hasher, value.__name__, ""):
+            raise UnhashableError(f"Cannot hash unversioned module {value.__name__}")
+
+    elif isinstance(value, types.FunctionType):
+        hasher.update(f"function:{value.__qualname__}".encode("utf-8"))
+        if _update_hash_with_external(hasher, value.__module__, value.__qualname__):
+            return
+        names = _update_hash_with_code(hasher, value.__code__)
+        for name in sorted(names):
+            if name in value.__globals__:
+                hasher.update(name.encode("utf-8"))
+                update_content_hash(hasher, value.__globals__[name], _seen)
+        for cell in value.__closure__ or ():
+            update_content_hash(hasher, cell.cell_contents, _seen)
+        update_content_hash(hasher, value.__defaults__, _seen)
+        update_content_hash(hasher, value.__kwdefaults__, _seen)
+
+    elif isinstance(value, functools.partial):
+        hasher.update(b"partial")
+        update_content_hash(hasher, value.func, _seen)
+        update_content_hash(hasher, value.args, _seen)
+        update_content_hash(hasher, value.keywords, _seen)
+
+    elif isinstance(value, types.MethodType):
+        hasher.update(b"method")
+        update_content_hash(hasher, value.__func__, _seen)
+        update_content_hash(hasher, value.__self__, _seen)
+
+    elif isinstance(value, (types.BuiltinFunctionType, numpy.ufunc)):
+        # bound to an object whose state can't be inspected, like a random generator
+        owner = getattr(value, "__self__", None)
+        if owner is not None and not isinstance(owner, types.ModuleType):
+            raise UnhashableError(f"Cannot hash the content of bound method {value!r}")
+        if isinstance(value, numpy.ufunc):
+            module_name = "numpy"
+        else:
+            module_name = value.__module__ or "builtins"
+        hasher.update(b"builtin")
+        if not _update_hash_with_external(hasher, module_name, value.__name__):
+            raise UnhashableError(f"Cannot hash unversioned function {value!r}")
+
+    elif isinstance(value, type):
+        hasher.update(f"type:{value.__qualname__}".encode("utf-8"))
+        if _update_hash_with_external(hasher, value.__module__, value.__qualname__):
+            return
+        for name, attribute in sorted(vars(value).items()):
+            if isinstance(attribute, (types.FunctionType, classmethod, staticmethod)):
+                hasher.update(name.encode("utf-8"))
+                update_content_hash(
+                    hasher, getattr(attribute, "__func__", attribute), _seen
+                )
+
+    elif dataclasses.is_dataclass(value):
+        update_content_hash(hasher, type(value), _seen)
+        for field in dataclasses.fields(value):
+            hasher.update(field.name.encode("utf-8"))
+            update_content_hash(hasher, getattr(value, field.name), _seen)
+
+    elif hasattr(value, "__dict__") and not callable(value):
+        update_content_hash(hasher, type(value), _seen)
+        update_content_hash(hasher, vars(value), _seen)
+
+    elif _is_importable(value) and _update_hash_with_external(
+        hasher, value.__module__, value.__qualname__
+    ):
+        # like the C dispatchers numpy wraps its functions with
+        pass
+
+    else:
+        raise UnhashableError(
+            f"Cannot hash the content of {type(value).__qualname__} object {value!r}"
+        )
+
+
+def get_content_hash(*values: Any) -> Optional[str]:
+    """
+    Get a hash of the content of the given values, see :func:`update_content_hash`.
+
+    Returns:
+        hexadecimal hash, or None if it can't be computed reliably.
+    """
+    hasher = hashlib.sha1()
+    try:
+        update_content_hash(hasher, values)
+    except UnhashableError as error:
+        LOGGER.debug(f"cannot compute content hash: {error}")
+        return None
+    return hasher.hexdigest()
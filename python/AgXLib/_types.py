@@ -1,3 +1,21 @@
+from typing import Protocol
+
 import numpy
 
 Ndarray = numpy.ndarray
+
+
+class ColorspaceLike(Protocol):
+    """
+    Any object describing a RGB colorspace like ``colour.RGB_Colourspace``.
+    """
+
+    primaries: Ndarray
+    """
+    gamut CIExy coordinates as shape=(3,2).
+    """
+
+    whitepoint: Ndarray
+    """
+    whitepoint CIExy coordinates as shape=(2,).
+    """
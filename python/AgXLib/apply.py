@@ -1,23 +1,453 @@
+import concurrent.futures
 import logging
+import os
+import threading
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
 
-import colour
 import numpy
 
 import AgXLib
+from ._colour import vector_dot
+from ._types import ColorspaceLike
 from ._types import Ndarray
+from .profiling import get_active_profiler
+from .precision import DTypeLike
+from .precision import resolve_dtype
 
 LOGGER = logging.getLogger(__name__)
 
+DEFAULT_TILE_BYTES = 2 * 1024 * 1024
+"""
+Approximate size in bytes of a row band processed at once by AgXPipeline.apply_tiled,
+when no explicit number of rows is requested.
+"""
+
+
+class AgXPipeline:
+    """
+    The AgX DRT with all its parameters frozen at creation.
+
+    Everything that only depends on parameters (like the inset matrix) is computed
+    once, and the scratch buffers needed to process a frame are kept around and reused
+    between frames of the same shape. Intended to process many frames with the same
+    parameters.
+
+    The inset and rotate values are bounds to the workspace colorspace selected.
+
+    Args:
+        src_colorspace:
+            colorspace the imagery is encoded in, INCLUDING transfer-function.
+            Used as the workspace colorspace for inset.
+            Any object with ``primaries`` and ``whitepoint`` attributes, like
+            ``colour.RGB_Colourspace``.
+        inset: amount of inset to apply per primary as [R, G, B], [-0,1] range.
+        rotate: amount of rotation in degree to apply per primary as [R, G, B], [-0,360+] range.
+        tonescale_min_EV:
+        tonescale_max_EV:
+        tonescale_contrast:
+        tonescale_limits:
+            tonescale parameters can be single or per-channel values,
+            see :class:`AgXLib.TonescaleParams`.
+        dtype:
+            precision of the computations and of the output arrays,
+            default to the library precision at the time of creation.
+    """
+
+    def __init__(
+        self,
+        src_colorspace: ColorspaceLike,
+        inset: tuple[float, float, float],
+        rotate: tuple[float, float, float],
+        tonescale_min_EV: float = -10.0,
+        tonescale_max_EV: float = +6.5,
+        tonescale_contrast: float = 2.0,
+        tonescale_limits: tuple[float, float] = (3.0, 3.25),
+        dtype: Optional[DTypeLike] = None,
+    ):
+        self.src_colorspace = src_colorspace
+        self.inset = tuple(inset)
+        self.rotate = tuple(rotate)
+        self.tonescale_min_EV = tonescale_min_EV
+        self.tonescale_max_EV = tonescale_max_EV
+        self.tonescale_contrast = tonescale_contrast
+        self.tonescale_limits = tuple(tonescale_limits)
+        self.dtype: numpy.dtype = resolve_dtype(dtype)
+        self.tonescale_params = AgXLib.TonescaleParams(
+            min_EV=tonescale_min_EV,
+            max_EV=tonescale_max_EV,
+            general_contrast=tonescale_contrast,
+            limits_contrast=self.tonescale_limits,
+        )
+        # single or per-channel values used to normalise the log encoding
+        self._log_min_EV = numpy.asarray(self.tonescale_params.min_EV)
+        self._log_max_EV = numpy.asarray(self.tonescale_params.max_EV)
+
+        # XXX: the inset created is a SMALLER variant of the gamut but the operation we want
+        #   to apply is actually a conversion to a BIGGER gamut, which will compress the value.
+        #   Where [1,0,0] could be converted to something like [0.85, 0.03, 0.02], leaving
+        #   room for the per-channel of the tonescale operation.
+        #   Which is why we use the inverse matrix.
+        _, inset_matrix = AgXLib.get_reshape_matrices(
+            src_gamut=src_colorspace.primaries,
+            src_whitepoint=src_colorspace.whitepoint,
+            inset_r=self.inset[0],
+            inset_g=self.inset[1],
+            inset_b=self.inset[2],
+            rotate_r=self.rotate[0],
+            rotate_g=self.rotate[1],
+            rotate_b=self.rotate[2],
+        )
+        self.inset_matrix: Ndarray = inset_matrix.astype(self.dtype)
+
+        # scratch buffers are per-thread so bands can be processed concurrently
+        self._local = threading.local()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._executor_workers: int = 0
+        # the pipeline can be shared between threads which all request the executor
+        self._executor_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}("
+            f"inset={self.inset}, rotate={self.rotate}, "
+            f"min_EV={self.tonescale_min_EV}, max_EV={self.tonescale_max_EV}, "
+            f"contrast={self.tonescale_contrast}, limits={self.tonescale_limits}, "
+            f"dtype={self.dtype}"
+            f")>"
+        )
+
+    def _get_scratch(self, shape: tuple[int, ...], dtype: numpy.dtype) -> Ndarray:
+        """
+        Get a buffer of the given shape and dtype.
+
+        Each thread has a single buffer, only grown when a bigger one is requested
+        and viewed with the requested shape and dtype, so processing arrays of
+        various sizes doesn't accumulate buffers.
+        """
+        dtype = numpy.dtype(dtype)
+        nbytes = int(numpy.prod(shape)) * dtype.itemsize
+        buffer: Optional[Ndarray] = getattr(self._local, "scratch", None)
+        if buffer is None or buffer.nbytes < nbytes:
+            # released first so the old and new buffers are never both allocated
+            self._local.scratch = None
+            buffer = numpy.empty(nbytes, dtype=numpy.uint8)
+            self._local.scratch = buffer
+        return buffer[:nbytes].view(dtype).reshape(shape)
+
+    def clear_scratch(self):
+        """
+        Release the scratch buffer allocated until now by the current thread.
+
+        Buffers of the worker threads are released with :meth:`close`.
+        """
+        self._local.__dict__.pop("scratch", None)
+
+    def _get_executor(self, workers: int) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Get a thread pool with the given number of workers, kept alive between calls
+        so the worker threads can reuse their scratch buffers.
+        """
+        previous_executor = None
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers != workers:
+                previous_executor = self._executor
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="AgXPipeline",
+                )
+                self._executor_workers = workers
+            executor = self._executor
+
+        # waiting for the tasks of the previous executor must not block other threads
+        if previous_executor is not None:
+            previous_executor.shutdown(wait=True)
+        return executor
+
+    def close(self):
+        """
+        Stop the worker threads started by :meth:`apply_tiled`, releasing their buffers.
+
+        The pipeline can still be used after.
+        """
+        with self._executor_lock:
+            executor = self._executor
+            self._executor = None
+            self._executor_workers = 0
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> "AgXPipeline":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_output_shape(self, src_array: Ndarray) -> tuple[int, ...]:
+        """
+        Shape of the array returned by :meth:`apply` for the given source array.
+        """
+        return src_array.shape[:-1] + (3,)
+
+    def get_output_dtype(self, src_array: Ndarray) -> numpy.dtype:
+        """
+        Dtype of the array returned by :meth:`apply` for the given source array.
+        """
+        return self.dtype
+
+    def apply(self, src_array: Ndarray, out: Optional[Ndarray] = None) -> Ndarray:
+        """
+        Apply the AgX DRT on the given array.
+
+        Arrays with rows are processed in bands of ``DEFAULT_TILE_BYTES`` so the
+        scratch and temporary arrays are the size of a band instead of the size of
+        the image, see :meth:`apply_tiled` to configure the bands.
+
+        Args:
+            src_array: R-G-B imagery data in any state
+            out:
+                optional array to write the result in, must have the shape and
+                dtype returned by :meth:`get_output_shape` and :meth:`get_output_dtype`.
+                Can be ``src_array`` for in-place.
+
+        Returns:
+            R-G-B image data array encoded in the source colorspace,
+            which is ``out`` if it was provided.
+        """
+        return self.apply_tiled(src_array, out=out)
+
+    def _apply_band(self, src_array: Ndarray, out: Ndarray) -> Ndarray:
+        """
+        Apply the AgX DRT on the whole given array at once.
+        """
+        profiler = get_active_profiler()
+        if profiler:
+            profiler.start()
+
+        dtype = self.get_output_dtype(src_array)
+
+        # anything outside the gamut of the working space is discarded as not valid
+        wip_array = self._get_scratch(src_array.shape, dtype)
+        numpy.maximum(src_array, 0.0, out=wip_array)
+        if profiler:
+            profiler.lap("clip", wip_array)
+
+        # apply "inset"
+        vector_dot(self.inset_matrix, wip_array, out=out)
+        if profiler:
+            profiler.lap("inset", out)
+
+        # convert to the log shaper space for the tonescale
+        AgXLib.convert_open_domain_to_normalized_log2(
+            out,
+            minimum_ev=self._log_min_EV,
+            maximum_ev=self._log_max_EV,
+            out=out,
+            clamp=True,
+        )
+        if profiler:
+            profiler.lap("log2", out)
+
+        # apply tonescale (1D curve)
+        AgXLib.apply_AgX_tonescale(out, params=self.tonescale_params, out=out)
+        if profiler:
+            profiler.lap("tonescale", out)
+
+        # linearize as the tonescale is display-referred as ~= 2.4 power function
+        # TODO verify if 2.4 or 2.2 needed
+        AgXLib.grading.spow(out, 2.4, out=out)
+        if profiler:
+            profiler.lap("power", out)
+
+        # we let the use handle the workspace colorspace -> display colorspace conversion
+        return out
+
+    def get_tile_rows(self, src_array: Ndarray) -> int:
+        """
+        Number of rows of a band so it fits in ``DEFAULT_TILE_BYTES``.
+        """
+        row_size = int(numpy.prod(self.get_output_shape(src_array)[1:]))
+        row_bytes = max(row_size * self.dtype.itemsize, 1)
+        return max(DEFAULT_TILE_BYTES // row_bytes, 1)
+
+    def apply_tiled(
+        self,
+        src_array: Ndarray,
+        out: Optional[Ndarray] = None,
+        tile_rows: Optional[int] = None,
+        workers: Optional[int] = 1,
+    ) -> Ndarray:
+        """
+        Apply the AgX DRT on the given array by processing it in bands of rows.
+
+        Peak memory usage is then bounded by the size of a band instead of the size
+        of the image, allowing to process images bigger than the available memory
+        when ``src_array`` and ``out`` are memory-mapped arrays (``numpy.memmap``).
+
+        Bands can be processed concurrently by multiple threads, the result is
+        identical to the one of a single thread.
+
+        Args:
+            src_array:
+                R-G-B imagery data in any state, of shape (height, width, 3)
+                or any shape where the first dimension are the rows.
+            out:
+                optional array to write the result in, same requirements as
+                in :meth:`apply`. Can be ``src_array`` for in-place.
+            tile_rows:
+                number of rows processed at once, default is computed so a band
+                is around DEFAULT_TILE_BYTES.
+            workers:
+                number of threads processing bands concurrently,
+                None to use the number of CPUs.
+                Peak memory usage is then bounded by ``workers`` bands.
+
+        Returns:
+            R-G-B image data array encoded in the source colorspace,
+            which is ``out`` if it was provided.
+        """
+        if out is None:
+            out = numpy.empty(self.get_output_shape(src_array), dtype=self.dtype)
+
+        if src_array.ndim < 2:
+            return self._apply_band(src_array, out=out)
+
+        tile_rows = tile_rows or self.get_tile_rows(src_array)
+        bands = [
+            (src_array[start : start + tile_rows], out[start : start + tile_rows])
+            for start in range(0, src_array.shape[0], tile_rows)
+        ]
+
+        workers = min(workers or os.cpu_count() or 1, len(bands))
+        if workers <= 1:
+            for src_band, out_band in bands:
+                self._apply_band(src_band, out=out_band)
+            return out
+
+        executor = self._get_executor(workers)
+        futures = [
+            executor.submit(self._apply_band, src_band, out_band)
+            for src_band, out_band in bands
+        ]
+        for future in futures:
+            # propagate any exception raised in the worker threads
+            future.result()
+
+        return out
+
+    def apply_batch(
+        self,
+        src_frames: Ndarray,
+        out: Optional[Ndarray] = None,
+        tile_rows: Optional[int] = None,
+        workers: Optional[int] = 1,
+    ) -> Ndarray:
+        """
+        Apply the AgX DRT on a stack of frames.
+
+        Frames are processed one after the other so scratch buffers are only
+        the size of a single frame (or band, see :meth:`apply_tiled`) and reused
+        across frames.
+
+        Args:
+            src_frames: R-G-B imagery data of shape (frames, height, width, 3).
+            out:
+                optional array to write the result in, same shape as ``src_frames``.
+                Can be ``src_frames`` for in-place.
+            tile_rows: see :meth:`apply_tiled`
+            workers: see :meth:`apply_tiled`
+
+        Returns:
+            R-G-B image data array of shape (frames, height, width, 3),
+            which is ``out`` if it was provided.
+        """
+        if out is None:
+            out = numpy.empty(self.get_output_shape(src_frames), dtype=self.dtype)
+
+        for index in range(src_frames.shape[0]):
+            self.apply_tiled(
+                src_frames[index],
+                out=out[index],
+                tile_rows=tile_rows,
+                workers=workers,
+            )
+
+        return out
+
+    def apply_sequence(
+        self,
+        src_frames: Iterable[Ndarray],
+        prefetch: bool = False,
+        reuse_output: bool = False,
+        tile_rows: Optional[int] = None,
+        workers: Optional[int] = 1,
+    ) -> Iterator[Ndarray]:
+        """
+        Lazily apply the AgX DRT on each frame of the given iterable.
+
+        Args:
+            src_frames:
+                iterable of R-G-B imagery data, usually a generator reading frames
+                from disk.
+            prefetch:
+                if True the next frame is requested from ``src_frames`` in a
+                background thread while the current one is processed.
+            reuse_output:
+                if True the same output array is yielded for all frames of the same
+                shape, which means it must be consumed before requesting the next
+                frame.
+            tile_rows: see :meth:`apply_tiled`
+            workers: see :meth:`apply_tiled`
+
+        Returns:
+            iterator of processed frames, in the same order as ``src_frames``.
+        """
+        out: Optional[Ndarray] = None
+
+        def _process(src_frame: Ndarray) -> Ndarray:
+            nonlocal out
+            shape = self.get_output_shape(src_frame)
+            if not reuse_output or out is None or out.shape != shape:
+                out = numpy.empty(shape, dtype=self.dtype)
+            return self.apply_tiled(
+                src_frame,
+                out=out,
+                tile_rows=tile_rows,
+                workers=workers,
+            )
+
+        frames_iterator = iter(src_frames)
+        if not prefetch:
+            for frame in frames_iterator:
+                yield _process(frame)
+            return
+
+        end = object()
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="AgXPipeline-prefetch",
+        ) as loader:
+            future = loader.submit(next, frames_iterator, end)
+            while True:
+                frame = future.result()
+                if frame is end:
+                    break
+                future = loader.submit(next, frames_iterator, end)
+                yield _process(frame)
+
 
 def convert_imagery_to_AgX_closeddomain(
     src_array: Ndarray,
-    src_colorspace: colour.RGB_Colourspace,
+    src_colorspace: ColorspaceLike,
     inset: tuple[float, float, float],
     rotate: tuple[float, float, float],
     tonescale_min_EV: float = -10.0,
     tonescale_max_EV: float = +6.5,
     tonescale_contrast: float = 2.0,
     tonescale_limits: tuple[float, float] = (3.0, 3.25),
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
 ) -> Ndarray:
     """
     Apply the AgX DRT on the given array and return a new array  encoded in
@@ -25,63 +455,46 @@ def convert_imagery_to_AgX_closeddomain(
 
     The inset and rotate values are bounds to the workspace colorspace selected.
 
+    Use :class:`AgXPipeline` instead when processing multiple arrays with the same
+    parameters.
+
     Args:
         src_array: R-G-B imagery data in any state
         src_colorspace:
             colorspace the src_array is encoded in, INCLUDING transfer-function.
             Used as the workspace colorspace for inset.
+            Any object with ``primaries`` and ``whitepoint`` attributes, like
+            ``colour.RGB_Colourspace``.
         inset: amount of inset to apply per primary as [R, G, B], [-0,1] range.
         rotate: amount of rotation in degree to apply per primary as [R, G, B], [-0,360+] range.
         tonescale_min_EV:
         tonescale_max_EV:
         tonescale_contrast:
         tonescale_limits:
+        out:
+            optional array to write the result in, of the same shape as src_array
+            (for R-G-B data). Can be ``src_array`` for in-place.
+        dtype: precision of the computation, default to the library precision.
 
     Returns:
-        new R-G-B image data array encoded in the provided workspace_colorspace
+        new R-G-B image data array encoded in the provided workspace_colorspace,
+        or ``out`` if provided.
     """
-    # anything outside the gamut of the working space is discarded as not valid
-    wip_array = src_array.clip(min=0.0)
-
-    inset_matrix = AgXLib.get_reshaped_colorspace_matrix(
-        src_gamut=src_colorspace.primaries,
-        src_whitepoint=src_colorspace.whitepoint,
-        inset_r=inset[0],
-        inset_g=inset[1],
-        inset_b=inset[2],
-        rotate_r=rotate[0],
-        rotate_g=rotate[1],
-        rotate_b=rotate[2],
-    )
-    # XXX: the inset created is a SMALLER variant of the gamut but the operation we want
-    #   to apply is actually a conversion to a BIGGER gamut, which will compress the value.
-    #   Where [1,0,0] could be converted to something like [0.85, 0.03, 0.02], leaving
-    #   room for the per-channel of the tonescale operation.
-    #   Which is why we invert the matrix.
-    inset_matrix = numpy.linalg.inv(inset_matrix)
-
-    # apply "inset"
-    wip_array = colour.algebra.vector_dot(inset_matrix, wip_array)
-
-    # convert to the log shaper space for the tonescale
-    wip_array = AgXLib.convert_open_domain_to_normalized_log2(
-        wip_array,
-        minimum_ev=tonescale_min_EV,
-        maximum_ev=tonescale_max_EV,
-    )
-    wip_array = wip_array.clip(0.0, 1.0)
-
-    # apply tonescale (1D curve)
-    wip_array = AgXLib.apply_AgX_tonescale(
-        wip_array,
-        min_EV=tonescale_min_EV,
-        max_EV=tonescale_max_EV,
-        general_contrast=tonescale_contrast,
-        limits_contrast=tonescale_limits,
+    profiler = get_active_profiler()
+    if profiler:
+        profiler.start()
+
+    pipeline = AgXPipeline(
+        src_colorspace=src_colorspace,
+        inset=inset,
+        rotate=rotate,
+        tonescale_min_EV=tonescale_min_EV,
+        tonescale_max_EV=tonescale_max_EV,
+        tonescale_contrast=tonescale_contrast,
+        tonescale_limits=tonescale_limits,
+        dtype=dtype,
     )
-    # linearize as the tonescale is display-referred as ~= 2.4 power function
-    # TODO verify if 2.4 or 2.2 needed
-    wip_array = colour.algebra.spow(wip_array, 2.4)
+    if profiler:
+        profiler.lap("setup", pipeline.inset_matrix)
 
-    # we let the use handle the workspace colorspace -> display colorspace conversion
-    return wip_array
+    return pipeline.apply(src_array, out=out)
@@ -1,9 +1,11 @@
 import logging
+from typing import Optional
 
-import colour.models
 import numpy
 
 from ._types import Ndarray
+from .precision import DTypeLike
+from .precision import resolve_dtype
 
 LOGGER = logging.getLogger(__name__)
 
@@ -13,6 +15,9 @@ def convert_open_domain_to_normalized_log2(
     minimum_ev: float = -10.0,
     maximum_ev: float = +6.5,
     in_midgrey: float = 0.18,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
+    clamp: bool = False,
 ) -> Ndarray:
     """
     "lin to log" operation.
@@ -20,26 +25,54 @@ def convert_open_domain_to_normalized_log2(
 
     Similar to OCIO lg2 AllocationTransform.
 
+    Values below or equal to float epsilon (including negatives) are encoded as 0.
+
     References:
         - [1] https://github.com/sobotka/AgX-S2O3/blob/main/AgX.py
 
     Args:
         in_od: floating point image in open-domain state
-        minimum_ev:
-        maximum_ev:
+        minimum_ev: single or per-channel value
+        maximum_ev: single or per-channel value
         in_midgrey:
+        out: optional array to write the result in, can be ``in_od`` for in-place.
+        dtype: precision of the computation, default to the library precision.
+        clamp: True to also clamp the result to the [0,1] range.
+
+    Returns:
+        new array in log encoding, or ``out`` if provided.
     """
-    out_log = numpy.where(
-        in_od <= numpy.finfo(float).eps,
-        0.0,
-        colour.models.log_encoding_Log2(
-            in_od,
-            middle_grey=in_midgrey,
-            min_exposure=minimum_ev,
-            max_exposure=maximum_ev,
-        ),
-    )
-    return out_log
+    in_od = numpy.asarray(in_od)
+    if out is None:
+        out = numpy.empty(in_od.shape, dtype=resolve_dtype(dtype))
+
+    epsilon = numpy.finfo(float).eps
+    # (log2(x / midgrey) - min) / range  is computed as  log2(x) * scale + offset
+    range_ev = numpy.subtract(maximum_ev, minimum_ev)
+    scale = numpy.asarray(1.0 / range_ev, dtype=out.dtype)
+    offset = (-numpy.log2(in_midgrey) - numpy.asarray(minimum_ev)) / range_ev
+    offset = numpy.asarray(offset, dtype=out.dtype)
+
+    # clamping already brings the values below epsilon to 0 if their encoding is
+    # negative, in which case they don't need to be masked.
+    epsilon_encoded = numpy.log2(epsilon) * scale + offset
+    mask_black = not (clamp and numpy.all(epsilon_encoded <= 0.0))
+    if mask_black:
+        # XXX: NaN are not black and stay NaN
+        is_black = numpy.less_equal(in_od, epsilon)
+
+    # values are raised to epsilon so log2 doesn't warn on the black ones, which are
+    # then set to 0. Faster than masking each operation with ``where``.
+    numpy.maximum(in_od, epsilon, out=out)
+    numpy.log2(out, out=out)
+    numpy.multiply(out, scale, out=out)
+    numpy.add(out, offset, out=out)
+
+    if mask_black:
+        numpy.copyto(out, 0.0, where=is_black)
+    if clamp:
+        numpy.clip(out, 0.0, 1.0, out=out)
+    return out
 
 
 def convert_normalized_log2_to_open_domain(
@@ -47,6 +80,8 @@ def convert_normalized_log2_to_open_domain(
     minimum_ev: float = -10.0,
     maximum_ev: float = +6.5,
     in_midgrey: float = 0.18,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
 ) -> Ndarray:
     """
     "log to lin" operation.
@@ -58,14 +93,28 @@ def convert_normalized_log2_to_open_domain(
 
     Args:
         in_log2: image in log encoding
-        minimum_ev:
-        maximum_ev:
+        minimum_ev: single or per-channel value
+        maximum_ev: single or per-channel value
         in_midgrey:
+        out: optional array to write the result in, can be ``in_log2`` for in-place.
+        dtype: precision of the computation, default to the library precision.
+
+    Returns:
+        new array in open-domain, or ``out`` if provided.
     """
-    od = colour.models.log_decoding_Log2(
-        in_log2,
-        middle_grey=in_midgrey,
-        min_exposure=minimum_ev,
-        max_exposure=maximum_ev,
-    )
-    return numpy.where(od <= 0.00017578125, 0.0, od)
+    in_log2 = numpy.asarray(in_log2)
+    if out is None:
+        out = numpy.empty(in_log2.shape, dtype=resolve_dtype(dtype))
+
+    # scalars are converted to the output precision to not upcast it
+    range_ev = numpy.asarray(numpy.subtract(maximum_ev, minimum_ev), dtype=out.dtype)
+    minimum_ev = numpy.asarray(minimum_ev, dtype=out.dtype)
+
+    # same as colour.models.log_decoding_Log2
+    numpy.multiply(in_log2, range_ev, out=out)
+    numpy.add(out, minimum_ev, out=out)
+    numpy.power(2.0, out, out=out)
+    numpy.multiply(out, in_midgrey, out=out)
+
+    numpy.copyto(out, 0.0, where=out <= 0.00017578125)
+    return out
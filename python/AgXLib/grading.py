@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from typing import Union
 
 import numpy
@@ -18,7 +19,23 @@ Types that can be converted to a RGB array
 """
 
 
-def sigmoid_parabolic(array: Ndarray, pivot: RGBable, t0: RGBable):
+def _get_out(out: Optional[Ndarray], *arrays) -> Ndarray:
+    """
+    Return the given out array or allocate a new one that can store the result of
+    a broadcasted operation between the given arrays.
+    """
+    if out is not None:
+        return out
+    shape = numpy.broadcast_shapes(*[numpy.shape(array) for array in arrays])
+    return numpy.empty(shape, dtype=numpy.result_type(*arrays, 1.0))
+
+
+def sigmoid_parabolic(
+    array: Ndarray,
+    pivot: RGBable,
+    t0: RGBable,
+    out: Optional[Ndarray] = None,
+) -> Ndarray:
     """
     Apply a sigmoid parabolic curve on the given array.
 
@@ -31,31 +48,54 @@ def sigmoid_parabolic(array: Ndarray, pivot: RGBable, t0: RGBable):
         array: [0-1] range RGB or single channel data
         pivot: pivot of the curve
         t0: center of the pivot
+        out: optional array to write the result in, can be ``array`` for in-place.
 
     Returns:
-        new array with the sigmoid curve applied
+        new array with the sigmoid curve applied, or ``out`` if provided.
     """
     pivot = numpy.array(pivot)
     t0 = numpy.array(t0)
-    return numpy.where(
-        array < t0,
-        t0 * (array / t0) ** pivot,
-        1 + (t0 - 1) * ((array - 1) / (t0 - 1)) ** pivot,
-    )
+    out = _get_out(out, array, pivot, t0)
+
+    # each side only read and write the values it owns so out can be array
+    lower = array < t0
+    numpy.divide(array, t0, out=out, where=lower)
+    numpy.power(out, pivot, out=out, where=lower)
+    numpy.multiply(out, t0, out=out, where=lower)
+
+    upper = numpy.logical_not(lower, out=lower)
+    numpy.subtract(array, 1, out=out, where=upper)
+    numpy.divide(out, t0 - 1, out=out, where=upper)
+    numpy.power(out, pivot, out=out, where=upper)
+    numpy.multiply(out, t0 - 1, out=out, where=upper)
+    numpy.add(out, 1, out=out, where=upper)
+    return out
 
 
 def spow(
     array: Ndarray,
     power: RGBable,
+    out: Optional[Ndarray] = None,
 ) -> Ndarray:
     """
     Power function safe for negatives.
 
     SRC: /src/OpenColorIO/ops/cdl/CDLOpCPU.cpp#L252
     SRC: /src/OpenColorIO/ops/gradingprimary/GradingPrimary.cpp#L194
+
+    Args:
+        array:
+        power:
+        out: optional array to write the result in, can be ``array`` for in-place.
+
+    Returns:
+        new array with the power applied, or ``out`` if provided.
     """
-    out = abs(array) ** power
-    out = out * numpy.copysign(1, array)
+    out = _get_out(out, array, power)
+    negatives = numpy.signbit(array)
+    numpy.abs(array, out=out)
+    numpy.power(out, power, out=out)
+    numpy.negative(out, out=out, where=negatives)
     return out
 
 
@@ -63,6 +103,7 @@ def saturation(
     array: Ndarray,
     amount: RGBable,
     coefs: RGBt = (0.2126, 0.7152, 0.0722),
+    out: Optional[Ndarray] = None,
 ) -> Ndarray:
     """
     Increase color saturation (not the similarly named clamp operation).
@@ -72,23 +113,23 @@ def saturation(
         - https://video.stackexchange.com/q/9866
 
     Args:
-        array:
+        array: R-G-B data with channels as the last dimension
         amount:
             saturation with different coeff per channel,
             or same value for all channels
         coefs:
             luma coefficient. Default if not specified are BT.709 ones.
+        out: optional array to write the result in, can be ``array`` for in-place.
 
     Returns:
-        input array with the given saturation value applied
+        new array with the given saturation value applied, or ``out`` if provided.
     """
+    out = _get_out(out, array, amount)
 
-    luma = array * coefs
-    luma = numpy.sum(luma, axis=2)
-    luma = numpy.stack((luma,) * 3, axis=-1)
-
-    array -= luma
-    array *= amount
-    array += luma
+    luma = numpy.dot(array, numpy.asarray(coefs))
+    luma = luma[..., numpy.newaxis]
 
-    return array
+    numpy.subtract(array, luma, out=out)
+    numpy.multiply(out, amount, out=out)
+    numpy.add(out, luma, out=out)
+    return out
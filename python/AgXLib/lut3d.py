@@ -0,0 +1,346 @@
+"""
+Bake the whole AgX DRT (with optional gradings) as a 3D LUT and apply it on imagery.
+
+Applying the LUT has a constant cost per pixel whatever the complexity of the
+transform that was baked, which makes heavy custom looks as cheap as the base DRT.
+
+.. code-block:: python
+
+    pipeline = AgXLib.AgXPipeline(colorspace, inset=(0.2, 0.2, 0.2), rotate=(0, 0, 0))
+    lut = AgXLib.bake_AgX_LUT3D(pipeline, size=65, pre_grading=my_look)
+    display = lut.apply(array)
+
+The LUT domain is log-shaped: open-domain values are first encoded with
+:func:`AgXLib.convert_open_domain_to_normalized_log2` (clamped to [0,1]) and the
+cube is sampled uniformly in that encoding.
+"""
+
+import dataclasses
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+from typing import Optional
+
+import numpy
+
+from ._hashing import get_content_hash
+from ._hashing import get_library_hash
+from ._types import Ndarray
+from .apply import AgXPipeline
+from .cctf import convert_normalized_log2_to_open_domain
+from .cctf import convert_open_domain_to_normalized_log2
+from .precision import DTypeLike
+from .precision import resolve_dtype
+
+LOGGER = logging.getLogger(__name__)
+
+LUT3D_CACHE_DIR: Optional[Path] = (
+    Path(os.environ["AGX_LUT_CACHE_DIR"])
+    if os.environ.get("AGX_LUT_CACHE_DIR")
+    else None
+)
+"""
+Default directory where baked 3D LUTs are persisted, so they can be reused by other
+processes. Default to the AGX_LUT_CACHE_DIR environment variable, None to disable.
+"""
+
+LUT3D_CHUNK_PIXELS = 2**18
+"""
+Number of pixels interpolated at once by :meth:`LUT3D.apply`, to bound the size of
+the temporary arrays.
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class LUT3D:
+    """
+    A transform baked as a 3D LUT over a log-shaped domain.
+
+    Intended to be created with :func:`bake_AgX_LUT3D`.
+    """
+
+    table: Ndarray
+    """
+    read-only array of shape=(size, size, size, 3) indexed as [R, G, B].
+    """
+
+    shaper_min_EV: float = -10.0
+    """
+    exposure mapped to the first sample of the cube.
+    """
+
+    shaper_max_EV: float = +6.5
+    """
+    exposure mapped to the last sample of the cube, brighter values are clamped.
+    """
+
+    @property
+    def size(self) -> int:
+        return self.table.shape[0]
+
+    def apply(
+        self,
+        array: Ndarray,
+        out: Optional[Ndarray] = None,
+        dtype: Optional[DTypeLike] = None,
+    ) -> Ndarray:
+        """
+        Apply the LUT on the given open-domain R-G-B array using tetrahedral
+        interpolation.
+
+        Args:
+            array: R-G-B imagery data of shape=(...,3), in the state the LUT expects.
+            out: optional array to write the result in, can be ``array`` for in-place.
+            dtype: precision of the computation, default to the library precision.
+
+        Returns:
+            new array of the same shape as ``array``, or ``out`` if provided.
+        """
+        array = numpy.asarray(array)
+        if array.shape[-1:] != (3,):
+            raise ValueError(f"Expected an R-G-B array, got shape {array.shape}.")
+
+        if out is None:
+            out = numpy.empty(array.shape, dtype=resolve_dtype(dtype))
+        table = self.table.astype(out.dtype, copy=False).reshape((-1, 3))
+
+        src_flat = array.reshape((-1, 3))
+        # XXX: reshape copy non-contiguous arrays, in which case we can't write in it
+        write_back = not out.flags.c_contiguous
+        if write_back:
+            out_flat = numpy.empty(src_flat.shape, dtype=out.dtype)
+        else:
+            out_flat = out.reshape((-1, 3))
+
+        for start in range(0, len(src_flat), LUT3D_CHUNK_PIXELS):
+            chunk = slice(start, start + LUT3D_CHUNK_PIXELS)
+            shaped = convert_open_domain_to_normalized_log2(
+                src_flat[chunk],
+                minimum_ev=self.shaper_min_EV,
+                maximum_ev=self.shaper_max_EV,
+                dtype=out.dtype,
+                clamp=True,
+            )
+            _interpolate_tetrahedral(shaped, table, self.size, out=out_flat[chunk])
+
+        if write_back:
+            numpy.copyto(out, out_flat.reshape(out.shape))
+        return out
+
+
+def _interpolate_tetrahedral(
+    array: Ndarray,
+    table: Ndarray,
+    size: int,
+    out: Ndarray,
+) -> Ndarray:
+    """
+    Vectorised tetrahedral interpolation of the cube.
+
+    Args:
+        array:
+            coordinates in the [0,1] domain as shape=(P,3), modified in-place.
+            Values outside the domain are not supported, except NaN which gives a
+            NaN pixel.
+        table: flat cube as shape=(size**3, 3), indexed as [R, G, B].
+        size: number of samples per side of the cube
+        out: array of shape=(P,3) to write the result in.
+    """
+    # NaN can't be cast to an index, they are looked up as 0 and restored at the end
+    is_nan = numpy.isnan(array)
+    has_nan = is_nan.any()
+    if has_nan:
+        numpy.copyto(array, 0.0, where=is_nan)
+        is_nan = is_nan.any(axis=1)
+
+    array *= size - 1
+    # coordinates are positive so truncation is the same as floor
+    index = array.astype(numpy.intp)
+    # the last sample is interpolated from the last cell
+    numpy.minimum(index, size - 2, out=index)
+    # fractional position in the cell, reusing the coordinates array
+    fraction = array
+    fraction -= index
+    fraction_r, fraction_g, fraction_b = fraction.T
+
+    stride_r = size * size
+    stride_g = size
+    stride_b = 1
+    stride_all = stride_r + stride_g + stride_b
+    corner = index[:, 0] * stride_r
+    corner += index[:, 1] * stride_g
+    corner += index[:, 2]
+
+    # each cell is split in 6 tetrahedra, selected by the order of the fractions,
+    # walked from the origin corner toward the opposite one, one axis at a time:
+    # first along the axis with the biggest fraction, last along the smallest.
+    first = numpy.maximum(numpy.maximum(fraction_r, fraction_g), fraction_b)
+    last = numpy.minimum(numpy.minimum(fraction_r, fraction_g), fraction_b)
+    middle = fraction_r + fraction_g
+    middle += fraction_b
+    middle -= first
+    middle -= last
+    # XXX: ties are resolved in opposite order for first and last so they always
+    #   are different axes, even when all fractions are equal.
+    first_stride = numpy.where(
+        fraction_r == first,
+        stride_r,
+        numpy.where(fraction_g == first, stride_g, stride_b),
+    )
+    last_stride = numpy.where(
+        fraction_b == last,
+        stride_b,
+        numpy.where(fraction_g == last, stride_g, stride_r),
+    )
+
+    # weights of the 4 vertices of the tetrahedron
+    weight3 = last[:, numpy.newaxis]
+    weight2 = (middle - last)[:, numpy.newaxis]
+    weight1 = (first - middle)[:, numpy.newaxis]
+    weight0 = (1.0 - first)[:, numpy.newaxis]
+
+    numpy.multiply(numpy.take(table, corner, axis=0), weight0, out=out)
+    vertex = corner + first_stride
+    out += numpy.take(table, vertex, axis=0) * weight1
+    numpy.subtract(corner + stride_all, last_stride, out=vertex)
+    out += numpy.take(table, vertex, axis=0) * weight2
+    numpy.add(corner, stride_all, out=vertex)
+    out += numpy.take(table, vertex, axis=0) * weight3
+
+    if has_nan:
+        out[is_nan] = numpy.nan
+    return out
+
+
+def _get_cache_path(
+    cache_dir: Path,
+    pipeline: AgXPipeline,
+    size: int,
+    pre_grading: Optional[Callable],
+    post_grading: Optional[Callable],
+    shaper_min_EV: float,
+    shaper_max_EV: float,
+) -> Optional[Path]:
+    """
+    Get the file the LUT baked with the given parameters is cached to.
+
+    The key covers the source of AgXLib and the full content of the grading
+    functions (bytecode, referenced globals, closures, defaults, partial arguments),
+    so editing any of them invalidate the LUTs they were baked in.
+
+    Returns:
+        None if no reliable key can be derived, in which case the LUT must not be
+        cached.
+    """
+    key_hash = get_content_hash(
+        get_library_hash(),
+        numpy.asarray(pipeline.src_colorspace.primaries),
+        numpy.asarray(pipeline.src_colorspace.whitepoint),
+        pipeline.inset,
+        pipeline.rotate,
+        pipeline.tonescale_params,
+        str(pipeline.dtype),
+        size,
+        (shaper_min_EV, shaper_max_EV),
+        pre_grading,
+        post_grading,
+    )
+    if key_hash is None:
+        return None
+    return cache_dir / f"AgXLib-lut3d-{key_hash[:16]}.npy"
+
+
+def bake_AgX_LUT3D(
+    pipeline: AgXPipeline,
+    size: int = 33,
+    pre_grading: Optional[Callable[[Ndarray], Ndarray]] = None,
+    post_grading: Optional[Callable[[Ndarray], Ndarray]] = None,
+    shaper_min_EV: float = -10.0,
+    shaper_max_EV: float = +6.5,
+    cache_dir: Optional[Path] = None,
+) -> LUT3D:
+    """
+    Bake the given pipeline, surrounded by optional gradings, as a 3D LUT.
+
+    The transform baked is ``post_grading(pipeline.apply(pre_grading(array)))``.
+
+    Args:
+        pipeline: AgX DRT to bake
+        size: number of samples per side of the cube.
+        pre_grading: optional function applied on the open-domain imagery first.
+        post_grading: optional function applied on the output of the pipeline.
+        shaper_min_EV: exposure of the darkest sample of the cube.
+        shaper_max_EV: exposure of the brightest sample of the cube.
+        cache_dir:
+            directory to persist the baked LUT in and load it from if it already
+            exists for the same parameters. Default to LUT3D_CACHE_DIR, caching is
+            disabled if both are None, or if the content of the grading functions
+            can't be hashed (like callable objects or bound methods of objects
+            with an internal state).
+
+    Returns:
+        baked LUT, that must not be modified.
+    """
+    if size < 2:
+        raise ValueError(f"LUT size must be at least 2, got <{size}>.")
+
+    cache_dir = cache_dir or LUT3D_CACHE_DIR
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = _get_cache_path(
+            Path(cache_dir),
+            pipeline,
+            size,
+            pre_grading,
+            post_grading,
+            shaper_min_EV,
+            shaper_max_EV,
+        )
+        if cache_path is None:
+            LOGGER.warning(
+                "cannot derive a cache key from the grading functions, "
+                "the LUT is not cached"
+            )
+
+    table = None
+    if cache_path and cache_path.exists():
+        try:
+            table = numpy.load(cache_path)
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"cannot load cached LUT <{cache_path}>: {error}")
+        else:
+            LOGGER.debug(f"loaded LUT from <{cache_path}>")
+
+    if table is None:
+        samples = numpy.linspace(0.0, 1.0, size)
+        grid = numpy.stack(
+            numpy.meshgrid(samples, samples, samples, indexing="ij"), axis=-1
+        )
+        table = convert_normalized_log2_to_open_domain(
+            grid,
+            minimum_ev=shaper_min_EV,
+            maximum_ev=shaper_max_EV,
+            dtype=pipeline.dtype,
+        )
+        if pre_grading is not None:
+            table = pre_grading(table)
+        table = pipeline.apply(table)
+        if post_grading is not None:
+            table = post_grading(table)
+
+        if cache_path:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # write then rename so concurrent processes never read a partial file
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("wb") as tmp_file:
+                numpy.save(tmp_file, table)
+            os.replace(tmp_path, cache_path)
+            LOGGER.debug(f"saved LUT to <{cache_path}>")
+
+    table.setflags(write=False)
+    return LUT3D(
+        table=table,
+        shaper_min_EV=shaper_min_EV,
+        shaper_max_EV=shaper_max_EV,
+    )
@@ -0,0 +1,240 @@
+"""
+Write LUT tables to disk in the formats used by grading and compositing software.
+
+The format is picked from the file extension:
+
+- 1D: ``.cube`` (Iridas/Resolve), ``.spi1d`` (Sony), ``.clf`` (Academy CLF v3), ``.npy``
+- 3D: ``.cube`` (Iridas/Resolve), ``.spi3d`` (Sony), ``.clf`` (Academy CLF v3), ``.npy``
+
+Text formats are produced like ``colour.write_LUT`` does, but rows are formatted and
+written by chunks, so the whole text never has to be held in memory. ``.npy`` stores
+the table as-is, which is the fastest to write and read back and lossless.
+
+.. code-block:: python
+
+    AgXLib.write_LUT3D(Path("look.cube"), table, name="look", decimals=7)
+"""
+
+import logging
+from pathlib import Path
+from typing import Sequence
+from typing import TextIO
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
+
+import numpy
+
+from ._types import Ndarray
+
+LOGGER = logging.getLogger(__name__)
+
+LUT_WRITE_CHUNK_ROWS = 2**16
+"""
+Maximum number of rows of the table formatted at once.
+"""
+
+LUT1D_FORMATS = (".cube", ".spi1d", ".clf", ".npy")
+LUT3D_FORMATS = (".cube", ".spi3d", ".clf", ".npy")
+
+
+def _write_rows(file: TextIO, rows: Ndarray, row_format: str):
+    """
+    Write each row of the given 2D array using the ``%`` formatting operator.
+
+    The format is applied on a whole chunk of rows at once, which is a single call
+    for python instead of one per value.
+    """
+    for start in range(0, len(rows), LUT_WRITE_CHUNK_ROWS):
+        chunk = rows[start : start + LUT_WRITE_CHUNK_ROWS]
+        file.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def _get_row_format(columns: int, decimals: int, prefix: str = "") -> str:
+    return prefix + " ".join([f"%.{decimals}f"] * columns) + "\n"
+
+
+def _open_clf(file: TextIO, name: str, comments: Sequence[str]):
+    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write(
+        f'<ProcessList compCLFversion="3.0" id={quoteattr(name or "LUT")} '
+        f"name={quoteattr(name)}>\n"
+    )
+    for comment in comments:
+        file.write(f"    <Description>{escape(comment)}</Description>\n")
+
+
+def _close_clf(file: TextIO):
+    file.write("</ProcessList>\n")
+
+
+def _validate_suffix(path: Path, formats: Sequence[str]) -> str:
+    suffix = path.suffix.lower()
+    if suffix not in formats:
+        raise ValueError(
+            f"Unsupported LUT format <{path.suffix}> for <{path}>, "
+            f"must be one of {list(formats)}."
+        )
+    return suffix
+
+
+def write_LUT1D(
+    path: Path,
+    table: Ndarray,
+    domain: tuple[float, float] = (0.0, 1.0),
+    name: str = "",
+    comments: Sequence[str] = (),
+    decimals: int = 7,
+):
+    """
+    Write the given 1D LUT to disk, in the format given by the path extension.
+
+    Args:
+        path: file to write, with an extension from LUT1D_FORMATS.
+        table:
+            shape=(size,) for the same curve on all channels or shape=(size, 3)
+            for a curve per channel, sampled uniformly over ``domain``.
+        domain: input values of the first and last samples.
+        name: title of the LUT, for the formats which support it.
+        comments: lines of comment, for the formats which support it.
+        decimals: number of decimals written per value, for text formats.
+
+    Raises:
+        ValueError: if the extension or the table shape is not supported.
+    """
+    path = Path(path)
+    suffix = _validate_suffix(path, LUT1D_FORMATS)
+    table = numpy.asarray(table)
+    if table.ndim not in (1, 2) or (table.ndim == 2 and table.shape[1] != 3):
+        raise ValueError(f"Expected a 1D LUT table, got shape {table.shape}.")
+
+    if suffix == ".npy":
+        numpy.save(path, table)
+        return
+
+    domain = numpy.asarray(domain, dtype=numpy.float64)
+    size = table.shape[0]
+    rows = table.reshape((size, -1))
+
+    with path.open("w") as file:
+        if suffix == ".cube":
+            # the format has no single-channel variant
+            rows = numpy.broadcast_to(rows, (size, 3))
+            file.write(f'TITLE "{name}"\n')
+            for comment in comments:
+                file.write(f"# {comment}\n")
+            file.write(f"LUT_1D_SIZE {size}\n")
+            if not numpy.array_equal(domain, [0.0, 1.0]):
+                domain_format = _get_row_format(3, decimals)
+                file.write("DOMAIN_MIN " + domain_format % ((domain[0],) * 3))
+                file.write("DOMAIN_MAX " + domain_format % ((domain[1],) * 3))
+            _write_rows(file, rows, _get_row_format(3, decimals))
+
+        elif suffix == ".spi1d":
+            file.write("Version 1\n")
+            file.write("From " + _get_row_format(2, decimals) % tuple(domain))
+            file.write(f"Length {size}\n")
+            file.write(f"Components {rows.shape[1]}\n")
+            file.write("{\n")
+            _write_rows(file, rows, _get_row_format(rows.shape[1], decimals, " "))
+            file.write("}\n")
+            for comment in comments:
+                file.write(f"# {comment}\n")
+
+        elif suffix == ".clf":
+            _open_clf(file, name, comments)
+            if not numpy.array_equal(domain, [0.0, 1.0]):
+                # LUT1D expects [0,1] inputs, so the domain is remapped first
+                value = f"%.{decimals}f"
+                file.write(
+                    '    <Range inBitDepth="32f" outBitDepth="32f">\n'
+                    f"        <minInValue>{value % domain[0]}</minInValue>\n"
+                    f"        <maxInValue>{value % domain[1]}</maxInValue>\n"
+                    f"        <minOutValue>0</minOutValue>\n"
+                    f"        <maxOutValue>1</maxOutValue>\n"
+                    "    </Range>\n"
+                )
+            file.write('    <LUT1D inBitDepth="32f" outBitDepth="32f">\n')
+            file.write(f'        <Array dim="{size} {rows.shape[1]}">\n')
+            _write_rows(file, rows, _get_row_format(rows.shape[1], decimals))
+            file.write("        </Array>\n")
+            file.write("    </LUT1D>\n")
+            _close_clf(file)
+
+
+def write_LUT3D(
+    path: Path,
+    table: Ndarray,
+    name: str = "",
+    comments: Sequence[str] = (),
+    decimals: int = 7,
+):
+    """
+    Write the given 3D LUT to disk, in the format given by the path extension.
+
+    The domain of the cube is always [0,1], see :class:`AgXLib.LUT3D` for a LUT
+    whose domain is shaped.
+
+    Args:
+        path: file to write, with an extension from LUT3D_FORMATS.
+        table: cube of shape=(size, size, size, 3) indexed as [R, G, B].
+        name: title of the LUT, for the formats which support it.
+        comments: lines of comment, for the formats which support it.
+        decimals: number of decimals written per value, for text formats.
+
+    Raises:
+        ValueError: if the extension or the table shape is not supported.
+    """
+    path = Path(path)
+    suffix = _validate_suffix(path, LUT3D_FORMATS)
+    table = numpy.asarray(table)
+    size = table.shape[0]
+    if table.shape != (size, size, size, 3):
+        raise ValueError(f"Expected a 3D LUT table, got shape {table.shape}.")
+
+    if suffix == ".npy":
+        numpy.save(path, table)
+        return
+
+    row_format = _get_row_format(3, decimals)
+
+    with path.open("w") as file:
+        if suffix == ".cube":
+            file.write(f'TITLE "{name}"\n')
+            for comment in comments:
+                file.write(f"# {comment}\n")
+            file.write(f"LUT_3D_SIZE {size}\n")
+            # red varies the fastest: each blue slice is written transposed
+            for blue in range(size):
+                rows = table[:, :, blue].transpose((1, 0, 2)).reshape((-1, 3))
+                _write_rows(file, rows, row_format)
+
+        elif suffix == ".spi3d":
+            file.write("SPILUT 1.0\n")
+            file.write("3 3\n")
+            file.write(f"{size} {size} {size}\n")
+            # blue varies the fastest, each row is prefixed by its indexes
+            indexes = numpy.indices((size, size), dtype=numpy.float64)
+            indexes = indexes.reshape((2, -1)).T
+            rows = numpy.empty((size * size, 6), dtype=numpy.float64)
+            rows[:, 1:3] = indexes
+            index_format = "%d %d %d " + row_format
+            for red in range(size):
+                rows[:, 0] = red
+                rows[:, 3:] = table[red].reshape((-1, 3))
+                _write_rows(file, rows, index_format)
+            for comment in comments:
+                file.write(f"# {comment}\n")
+
+        elif suffix == ".clf":
+            _open_clf(file, name, comments)
+            file.write(
+                '    <LUT3D inBitDepth="32f" outBitDepth="32f" '
+                'interpolation="tetrahedral">\n'
+            )
+            file.write(f'        <Array dim="{size} {size} {size} 3">\n')
+            # blue varies the fastest
+            for red in range(size):
+                _write_rows(file, table[red].reshape((-1, 3)), row_format)
+            file.write("        </Array>\n")
+            file.write("    </LUT3D>\n")
+            _close_clf(file)
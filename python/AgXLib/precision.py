@@ -0,0 +1,65 @@
+"""
+Control the floating point precision used for computations.
+
+By default, computations are performed in float64 whatever the input dtype is. The
+precision can be changed for the whole library with :func:`set_precision`, or per
+call with the ``dtype`` argument that most functions accept.
+"""
+
+import logging
+from typing import Optional
+from typing import Union
+
+import numpy
+
+LOGGER = logging.getLogger(__name__)
+
+DTypeLike = Union[str, type, numpy.dtype]
+
+SUPPORTED_PRECISIONS: tuple[numpy.dtype, ...] = (
+    numpy.dtype(numpy.float32),
+    numpy.dtype(numpy.float64),
+)
+
+_PRECISION: numpy.dtype = numpy.dtype(numpy.float64)
+
+
+def _validate(dtype: DTypeLike) -> numpy.dtype:
+    dtype = numpy.dtype(dtype)
+    if dtype not in SUPPORTED_PRECISIONS:
+        raise ValueError(
+            f"Unsupported precision <{dtype}>, "
+            f"must be one of {[str(supported) for supported in SUPPORTED_PRECISIONS]}."
+        )
+    return dtype
+
+
+def set_precision(dtype: DTypeLike):
+    """
+    Set the floating point precision used by default for all computations.
+
+    Args:
+        dtype: "float32" or "float64" (or the equivalent numpy types).
+    """
+    global _PRECISION
+    _PRECISION = _validate(dtype)
+    LOGGER.debug(f"set precision to {_PRECISION}")
+
+
+def get_precision() -> numpy.dtype:
+    """
+    Get the floating point precision used by default for all computations.
+    """
+    return _PRECISION
+
+
+def resolve_dtype(dtype: Optional[DTypeLike] = None) -> numpy.dtype:
+    """
+    Get the dtype to perform a computation with.
+
+    Args:
+        dtype: dtype explicitly requested for a call, None to use the library precision.
+    """
+    if dtype is None:
+        return _PRECISION
+    return _validate(dtype)
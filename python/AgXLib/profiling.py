@@ -0,0 +1,208 @@
+"""
+Optional instrumentation of the stages of the AgX DRT.
+
+Profiling is disabled by default and only cost a global lookup per processed array.
+Enable it for a block of code with :func:`profile_stages`:
+
+.. code-block:: python
+
+    with AgXLib.profiling.profile_stages() as profiler:
+        AgXLib.convert_imagery_to_AgX_closeddomain(array, ...)
+
+    print(profiler.as_dict()["totals"])
+    profiler.write_chrome_trace(Path("trace.json"))
+"""
+
+import contextlib
+import dataclasses
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+
+import numpy
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class StageRecord:
+    """
+    Measurements of a single stage of processing.
+    """
+
+    name: str
+
+    start: float
+    """
+    time in seconds at which the stage started, relative to the profiler creation.
+    """
+
+    duration: float
+    """
+    wall time in seconds of the stage.
+    """
+
+    shape: tuple[int, ...]
+    """
+    shape of the array produced by the stage.
+    """
+
+    dtype: str
+    """
+    dtype of the array produced by the stage.
+    """
+
+    allocated_bytes: Optional[int]
+    """
+    peak of memory allocated during the stage, None if memory was not traced.
+    """
+
+    thread_id: int
+
+
+class StageProfiler:
+    """
+    Collect :class:`StageRecord` for each stage of processing.
+
+    A stage is delimited by the previous call to :meth:`lap` (or :meth:`start`)
+    in the same thread.
+
+    Args:
+        trace_memory:
+            if True, also measure the memory allocated by each stage using
+            ``tracemalloc``, which significantly slow down processing. Measures
+            include allocations of all threads.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records: list[StageRecord] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+
+    def start(self):
+        """
+        Mark the beginning of the first stage for the current thread.
+        """
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self._local.memory = tracemalloc.get_traced_memory()[0]
+        self._local.time = time.perf_counter()
+
+    def lap(self, name: str, array: numpy.ndarray):
+        """
+        Mark the end of the given stage for the current thread, which is also the
+        beginning of the next one.
+
+        Args:
+            name: name of the stage that just finished
+            array: array produced by the stage
+        """
+        end_time = time.perf_counter()
+        start_time = getattr(self._local, "time", end_time)
+
+        allocated_bytes = None
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            allocated_bytes = max(peak - getattr(self._local, "memory", current), 0)
+            tracemalloc.reset_peak()
+            self._local.memory = current
+
+        self.records.append(
+            StageRecord(
+                name=name,
+                start=start_time - self._origin,
+                duration=end_time - start_time,
+                shape=tuple(numpy.shape(array)),
+                dtype=str(getattr(array, "dtype", type(array).__name__)),
+                allocated_bytes=allocated_bytes,
+                thread_id=threading.get_ident(),
+            )
+        )
+        # don't include the time spent recording in the next stage
+        self._local.time = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        """
+        Get all the records and the total duration per stage as json-serializable dict.
+        """
+        totals: dict[str, float] = {}
+        for record in self.records:
+            totals[record.name] = totals.get(record.name, 0.0) + record.duration
+
+        return {
+            "stages": [dataclasses.asdict(record) for record in self.records],
+            "totals": totals,
+        }
+
+    def as_chrome_trace(self) -> dict:
+        """
+        Get all the records in the Chrome trace event format, which can be opened
+        in ``chrome://tracing`` or https://ui.perfetto.dev.
+        """
+        events = []
+        for record in self.records:
+            args = {"shape": list(record.shape), "dtype": record.dtype}
+            if record.allocated_bytes is not None:
+                args["allocated_bytes"] = record.allocated_bytes
+            events.append(
+                {
+                    "name": record.name,
+                    "cat": "AgX",
+                    "ph": "X",
+                    "ts": record.start * 1e6,
+                    "dur": record.duration * 1e6,
+                    "pid": os.getpid(),
+                    "tid": record.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path):
+        """
+        Write the records as a Chrome trace json file.
+        """
+        path.write_text(json.dumps(self.as_chrome_trace(), indent=2))
+
+
+_ACTIVE_PROFILER: Optional[StageProfiler] = None
+
+
+def get_active_profiler() -> Optional[StageProfiler]:
+    """
+    Get the profiler stages must be recorded in, None if profiling is disabled.
+    """
+    return _ACTIVE_PROFILER
+
+
+@contextlib.contextmanager
+def profile_stages(trace_memory: bool = False) -> Iterator[StageProfiler]:
+    """
+    Record the stages of all AgX processing performed in this context, including
+    the one happening in other threads.
+
+    Args:
+        trace_memory: see :class:`StageProfiler`
+    """
+    global _ACTIVE_PROFILER
+
+    profiler = StageProfiler(trace_memory=trace_memory)
+    previous_profiler = _ACTIVE_PROFILER
+    stop_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+    if stop_tracemalloc:
+        tracemalloc.start()
+
+    _ACTIVE_PROFILER = profiler
+    try:
+        yield profiler
+    finally:
+        _ACTIVE_PROFILER = previous_profiler
+        if stop_tracemalloc:
+            tracemalloc.stop()
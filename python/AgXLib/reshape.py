@@ -3,17 +3,29 @@ Mathematical operations to change the shape of a colorspace's gamut while mainta
 its whitepoint.
 """
 
+import functools
 import logging
 import math
 
 import numpy
 
-import colour
-
+from ._colour import matrix_dot
+from ._colour import normalised_primary_matrix
 from ._types import Ndarray
 
 LOGGER = logging.getLogger(__name__)
 
+RESHAPE_CACHE_SIZE = 256
+"""
+Maximum number of matrices pairs kept by :func:`get_reshape_matrices`.
+"""
+
+RESHAPE_CACHE_DECIMALS = 10
+"""
+Number of decimals the arguments of :func:`get_reshape_matrices` are rounded to,
+to build the cache key.
+"""
+
 
 def _lerp(amount: float, a1: float, a2: float) -> float:
     """
@@ -180,11 +192,125 @@ def get_reshaped_colorspace_matrix(
         rotate_b,
     )
 
-    src_to_XYZ = colour.normalised_primary_matrix(src_gamut, src_whitepoint)
-    dst_to_XYZ = colour.normalised_primary_matrix(gamut_rotated, src_whitepoint)
+    src_to_XYZ = normalised_primary_matrix(src_gamut, src_whitepoint)
+    dst_to_XYZ = normalised_primary_matrix(gamut_rotated, src_whitepoint)
     dst_from_XYZ = numpy.linalg.inv(dst_to_XYZ)
 
-    return colour.algebra.matrix_dot(dst_from_XYZ, src_to_XYZ)
+    return matrix_dot(dst_from_XYZ, src_to_XYZ)
+
+
+def get_reshaped_colorspace_matrices(
+    src_gamut: Ndarray,
+    src_whitepoint: Ndarray,
+    insets: Ndarray,
+    rotations: Ndarray,
+) -> Ndarray:
+    """
+    Vectorised variant of :func:`get_reshaped_colorspace_matrix` that compute the
+    matrices for N combinations of inset/rotate parameters at once.
+
+    Args:
+        src_gamut: gamut CIExy coordinates as shape=(3,2).
+        src_whitepoint: whitepoint CIExy coordinates as shape=(2,). Used as center for operations.
+        insets: amount of inset for the R,G,B primaries as shape=(N,3), [-0,1] range
+        rotations: angle of rotation for the R,G,B primaries in degree as shape=(N,3)
+
+    Returns:
+        3x3 normalised_primary_matrix for each combination as array of shape=(N,3,3).
+    """
+    src_gamut = numpy.asarray(src_gamut, dtype=numpy.float64)
+    src_whitepoint = numpy.asarray(src_whitepoint, dtype=numpy.float64)
+    insets = numpy.asarray(insets, dtype=numpy.float64)
+    rotations = numpy.asarray(rotations, dtype=numpy.float64)
+    insets, rotations = numpy.broadcast_arrays(insets, rotations)
+
+    # shape=(N,3,2), same as get_inset_gamut
+    amount = insets[..., numpy.newaxis]
+    gamut_inset = (1.0 - amount) * src_gamut + amount * src_whitepoint
+
+    # same as get_rotated_gamut
+    angles = numpy.radians(rotations)
+    sin_a = numpy.sin(angles)
+    cos_a = numpy.cos(angles)
+    offset_x = gamut_inset[..., 0] - src_whitepoint[0]
+    offset_y = gamut_inset[..., 1] - src_whitepoint[1]
+    rotated_x = offset_x * cos_a - offset_y * sin_a
+    # XXX: rotate_point_around use the already rotated x to compute y, replicated
+    #   here so both implementations produce the same matrices.
+    rotated_y = rotated_x * sin_a + offset_y * cos_a
+    gamut_rotated = numpy.stack(
+        [rotated_x + src_whitepoint[0], rotated_y + src_whitepoint[1]],
+        axis=-1,
+    )
+
+    src_to_XYZ = normalised_primary_matrix(src_gamut, src_whitepoint)
+    dst_to_XYZ = normalised_primary_matrix(gamut_rotated, src_whitepoint)
+    src_to_XYZ = numpy.broadcast_to(src_to_XYZ, dst_to_XYZ.shape)
+    # solve(A, B) == inv(A) @ B without computing the inverse
+    return numpy.linalg.solve(dst_to_XYZ, src_to_XYZ)
+
+
+@functools.lru_cache(maxsize=RESHAPE_CACHE_SIZE)
+def _get_reshape_matrices(
+    src_gamut: tuple[float, ...],
+    src_whitepoint: tuple[float, float],
+    insets: tuple[float, float, float],
+    rotations: tuple[float, float, float],
+) -> tuple[Ndarray, Ndarray]:
+    matrix = get_reshaped_colorspace_matrix(
+        numpy.array(src_gamut).reshape((3, 2)),
+        numpy.array(src_whitepoint),
+        *insets,
+        *rotations,
+    )
+    matrix_inverse = numpy.linalg.inv(matrix)
+    matrix.setflags(write=False)
+    matrix_inverse.setflags(write=False)
+    return matrix, matrix_inverse
+
+
+def get_reshape_matrices(
+    src_gamut: Ndarray,
+    src_whitepoint: Ndarray,
+    inset_r: float = 0.0,
+    inset_g: float = 0.0,
+    inset_b: float = 0.0,
+    rotate_r: float = 0.0,
+    rotate_g: float = 0.0,
+    rotate_b: float = 0.0,
+) -> tuple[Ndarray, Ndarray]:
+    """
+    Same as :func:`get_reshaped_colorspace_matrix` but also return the inverse matrix,
+    and cache the result for the given arguments.
+
+    Arguments are rounded to RESHAPE_CACHE_DECIMALS to build the cache key. The cache
+    keeps the RESHAPE_CACHE_SIZE last used combinations.
+
+    Returns:
+        tuple of (reshaped matrix, inverse of reshaped matrix) as arrays of
+        shape=(3,3), that must not be modified.
+    """
+
+    def _key(values) -> tuple[float, ...]:
+        values = numpy.round(
+            numpy.asarray(values, dtype=numpy.float64).ravel(), RESHAPE_CACHE_DECIMALS
+        )
+        # avoid -0.0 and 0.0 being different keys
+        return tuple(float(value) + 0.0 for value in values)
+
+    return _get_reshape_matrices(
+        _key(src_gamut),
+        _key(src_whitepoint),
+        _key((inset_r, inset_g, inset_b)),
+        _key((rotate_r, rotate_g, rotate_b)),
+    )
+
+
+def clear_reshape_matrices_cache():
+    """
+    Remove all the matrices cached by :func:`get_reshape_matrices`.
+    """
+    _get_reshape_matrices.cache_clear()
 
 
 if __name__ == "__main__":
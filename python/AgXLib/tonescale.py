@@ -5,12 +5,20 @@ Which based himself on the work of Jed Smith.
 
 Slight modifications in terms of code style but outcome is similar.
 """
+
+import dataclasses
+import functools
 import logging
 import typing
+from typing import Callable
+from typing import Optional
+from typing import Union
 
 import numpy
 
 from ._types import Ndarray
+from .precision import DTypeLike
+from .precision import resolve_dtype
 
 LOGGER = logging.getLogger(__name__)
 
@@ -116,16 +124,573 @@ def _equation_full_curve(
     )
 
 
-def apply_AgX_tonescale(
+def _equation_curve_side(
+    array: Ndarray,
+    x_pivot: float,
+    y_pivot: float,
+    slope_pivot: float,
+    power: float,
+    scale: float,
+) -> Ndarray:
+    """
+    Same as _equation_curve but for values on a single side of the pivot, which
+    means a single ``power`` and ``scale`` (negative for the toe).
+
+    Parameters are expected to be scalars and ``array`` is modified in-place.
+    """
+    # _equation_term
+    array -= x_pivot
+    array *= slope_pivot / scale
+    # _equation_hyperbolic
+    denominator = numpy.power(array, power)
+    denominator += 1.0
+    numpy.power(denominator, 1.0 / power, out=denominator)
+    array /= denominator
+
+    array *= scale
+    array += y_pivot
+    return array
+
+
+@dataclasses.dataclass(frozen=True)
+class TonescaleParams:
+    """
+    Parameters of the AgX tonescale, with the coefficients of the curve that only
+    depend on them computed once.
+
+    Each parameter can either be a single value, or per-channel (R, G, B) values,
+    in which case the curve is evaluated separately on each channel of the last
+    axis, with its own coefficients. Per-channel ``limits_contrast`` are given as
+    (toe R-G-B, shoulder R-G-B).
+
+    Create it once and pass it to :func:`apply_AgX_tonescale` when applying the
+    same tonescale many times (on tiles, frames, ...).
+
+    Raises:
+        ValueError: if parameters are neither single nor per-channel values.
+    """
+
+    min_EV: Union[float, tuple[float, float, float]] = -10.0
+    max_EV: Union[float, tuple[float, float, float]] = +6.5
+    general_contrast: Union[float, tuple[float, float, float]] = 2.0
+    limits_contrast: Union[
+        tuple[float, float],
+        tuple[tuple[float, float, float], tuple[float, float, float]],
+    ] = (3.0, 3.25)
+
+    x_pivot: float = dataclasses.field(init=False, repr=False, compare=False)
+    y_pivot: float = dataclasses.field(init=False, repr=False, compare=False)
+    toe_power: float = dataclasses.field(init=False, repr=False, compare=False)
+    shoulder_power: float = dataclasses.field(init=False, repr=False, compare=False)
+    toe_scale: float = dataclasses.field(init=False, repr=False, compare=False)
+    """
+    scale of the curve below the pivot, negative.
+    """
+    shoulder_scale: float = dataclasses.field(init=False, repr=False, compare=False)
+    """
+    scale of the curve above the pivot.
+    """
+
+    channels: tuple["TonescaleParams", ...] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+    """
+    single-value parameters of each channel if parameters are per-channel, else empty.
+    The coefficients above are then per-channel tuples.
+    """
+
+    def __post_init__(self):
+        # XXX: frozen dataclass, so attributes have to be set with object.__setattr__
+        def _set(name, value):
+            object.__setattr__(self, name, value)
+
+        min_EV = numpy.asarray(self.min_EV, dtype=numpy.float64)
+        max_EV = numpy.asarray(self.max_EV, dtype=numpy.float64)
+        general_contrast = numpy.asarray(self.general_contrast, dtype=numpy.float64)
+        limits_contrast = numpy.asarray(self.limits_contrast, dtype=numpy.float64)
+
+        if (
+            min_EV.ndim == 0
+            and max_EV.ndim == 0
+            and general_contrast.ndim == 0
+            and limits_contrast.shape == (2,)
+        ):
+            self._set_single(
+                float(min_EV),
+                float(max_EV),
+                float(general_contrast),
+                (float(limits_contrast[0]), float(limits_contrast[1])),
+            )
+            return
+
+        if limits_contrast.ndim == 1:
+            limits_contrast = limits_contrast[:, numpy.newaxis]
+        try:
+            min_EV = numpy.broadcast_to(min_EV, (3,))
+            max_EV = numpy.broadcast_to(max_EV, (3,))
+            general_contrast = numpy.broadcast_to(general_contrast, (3,))
+            limits_contrast = numpy.broadcast_to(limits_contrast, (2, 3))
+        except ValueError as error:
+            raise ValueError(
+                "Tonescale parameters must be single or per-channel (R, G, B) values, "
+                f"got min_EV={self.min_EV}, max_EV={self.max_EV}, "
+                f"general_contrast={self.general_contrast}, "
+                f"limits_contrast={self.limits_contrast}."
+            ) from error
+
+        channels = tuple(
+            TonescaleParams(
+                min_EV=min_EV[channel],
+                max_EV=max_EV[channel],
+                general_contrast=general_contrast[channel],
+                limits_contrast=limits_contrast[:, channel],
+            )
+            for channel in range(3)
+        )
+        _set("channels", channels)
+        for name in (
+            "min_EV",
+            "max_EV",
+            "general_contrast",
+            "x_pivot",
+            "y_pivot",
+            "toe_power",
+            "shoulder_power",
+            "toe_scale",
+            "shoulder_scale",
+        ):
+            _set(name, tuple(getattr(params, name) for params in channels))
+        _set("limits_contrast", (self.toe_power, self.shoulder_power))
+
+    def _set_single(
+        self,
+        min_EV: float,
+        max_EV: float,
+        general_contrast: float,
+        limits_contrast: tuple[float, float],
+    ):
+        def _set(name, value):
+            object.__setattr__(self, name, value)
+
+        _set("min_EV", min_EV)
+        _set("max_EV", max_EV)
+        _set("general_contrast", general_contrast)
+        _set("limits_contrast", limits_contrast)
+        _set("channels", ())
+
+        x_pivot = abs(min_EV / (max_EV - min_EV))
+        y_pivot = 0.50
+        _set("x_pivot", x_pivot)
+        _set("y_pivot", y_pivot)
+        _set("toe_power", limits_contrast[0])
+        _set("shoulder_power", limits_contrast[1])
+        _set(
+            "toe_scale",
+            -float(_equation_scale(x_pivot, y_pivot, general_contrast, self.toe_power)),
+        )
+        _set(
+            "shoulder_scale",
+            float(
+                _equation_scale(
+                    1.0 - x_pivot,
+                    1.0 - y_pivot,
+                    general_contrast,
+                    self.shoulder_power,
+                )
+            ),
+        )
+
+
+def _per_channel(
+    function: Callable, array: Ndarray, params: TonescaleParams, out: Ndarray, **kwargs
+) -> Ndarray:
+    """
+    Call ``function(array, params, out)`` on each channel of the last axis with the
+    parameters of that channel, so per-channel parameters never need to be
+    broadcast to the size of the array.
+    """
+    array = numpy.asarray(array)
+    if array.shape[-1:] != (len(params.channels),):
+        raise ValueError(
+            f"Per-channel tonescale parameters expect an array with "
+            f"{len(params.channels)} channels on its last axis, got shape {array.shape}."
+        )
+    for channel, channel_params in enumerate(params.channels):
+        function(array[..., channel], channel_params, out=out[..., channel], **kwargs)
+    return out
+
+
+def _equation_full_curve_partitioned(
+    array: Ndarray,
+    params: TonescaleParams,
+    out: Ndarray,
+) -> Ndarray:
+    """
+    Same result as _equation_full_curve but each value only evaluate the side of
+    the curve (toe or shoulder) it belongs to.
+
+    ``out`` can be ``array``.
+    """
+    if params.channels:
+        return _per_channel(_equation_full_curve_partitioned, array, params, out)
+
+    # scalars are converted to the same precision as the output to not upcast it
+    scalar = out.dtype.type
+    x_pivot = scalar(params.x_pivot)
+    y_pivot = scalar(params.y_pivot)
+    slope_pivot = scalar(params.general_contrast)
+
+    array = numpy.asarray(array)
+    is_shoulder = numpy.greater_equal(array, x_pivot)
+    # XXX: NaN are not >= so they end up in the toe like with _equation_full_curve
+    is_toe = numpy.logical_not(is_shoulder)
+
+    # XXX: values are gathered before being written so out can be array
+    out[is_toe] = _equation_curve_side(
+        array[is_toe].astype(out.dtype, copy=False),
+        x_pivot,
+        y_pivot,
+        slope_pivot,
+        scalar(params.toe_power),
+        scalar(params.toe_scale),
+    )
+    out[is_shoulder] = _equation_curve_side(
+        array[is_shoulder].astype(out.dtype, copy=False),
+        x_pivot,
+        y_pivot,
+        slope_pivot,
+        scalar(params.shoulder_power),
+        scalar(params.shoulder_scale),
+    )
+    return out
+
+
+def _evaluate_AgX_tonescale(
     array: Ndarray,
+    params: TonescaleParams,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
+) -> Ndarray:
+    if out is None:
+        out = numpy.empty(numpy.shape(array), dtype=resolve_dtype(dtype))
+    return _equation_full_curve_partitioned(array, params, out=out)
+
+
+def _equation_curve_side_inverse(
+    array: Ndarray,
+    x_pivot: float,
+    y_pivot: float,
+    slope_pivot: float,
+    power: float,
+    scale: float,
+) -> Ndarray:
+    """
+    Closed-form inverse of _equation_curve_side.
+
+    Each side of the curve is ``y = scale * h(t) + y_pivot`` with
+    ``h(t) = t / (1 + t^p)^(1/p)`` which is inverted as ``t = u / (1 - u^p)^(1/p)``
+    with ``u = (y - y_pivot) / scale``.
+
+    Parameters are expected to be scalars and ``array`` is modified in-place.
+    Values beyond the asymptotes of the curve have no inverse and return inf or nan.
+    """
+    array -= y_pivot
+    array /= scale
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        denominator = numpy.power(array, power)
+        numpy.subtract(1.0, denominator, out=denominator)
+        numpy.power(denominator, 1.0 / power, out=denominator)
+        array /= denominator
+    array *= scale / slope_pivot
+    array += x_pivot
+    return array
+
+
+def _evaluate_AgX_tonescale_inverse(
+    array: Ndarray,
+    params: TonescaleParams,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
+) -> Ndarray:
+    """
+    Same split of the values between toe and shoulder as
+    _equation_full_curve_partitioned, but on the output side of the pivot.
+
+    ``out`` can be ``array``.
+    """
+    if out is None:
+        out = numpy.empty(numpy.shape(array), dtype=resolve_dtype(dtype))
+    if params.channels:
+        return _per_channel(_evaluate_AgX_tonescale_inverse, array, params, out)
+
+    scalar = out.dtype.type
+    x_pivot = scalar(params.x_pivot)
+    y_pivot = scalar(params.y_pivot)
+    slope_pivot = scalar(params.general_contrast)
+
+    array = numpy.asarray(array)
+    is_shoulder = numpy.greater_equal(array, y_pivot)
+    # XXX: NaN are not >= so they end up in the toe and stay NaN
+    is_toe = numpy.logical_not(is_shoulder)
+
+    # XXX: values are gathered before being written so out can be array
+    out[is_toe] = _equation_curve_side_inverse(
+        array[is_toe].astype(out.dtype, copy=False),
+        x_pivot,
+        y_pivot,
+        slope_pivot,
+        scalar(params.toe_power),
+        scalar(params.toe_scale),
+    )
+    out[is_shoulder] = _equation_curve_side_inverse(
+        array[is_shoulder].astype(out.dtype, copy=False),
+        x_pivot,
+        y_pivot,
+        slope_pivot,
+        scalar(params.shoulder_power),
+        scalar(params.shoulder_scale),
+    )
+    return out
+
+
+LUT_MAX_SIZE = 2**20
+"""
+Maximum size a baked tonescale LUT can grow to when trying to satisfy an error bound.
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class TonescaleLUT:
+    """
+    The AgX tonescale (or its inverse) baked as a 1D LUT.
+
+    The forward tonescale is baked over the [0,1] domain, and the inverse over the
+    range of the forward tonescale for that domain.
+
+    Intended to be created with :func:`bake_AgX_tonescale`.
+    """
+
+    table: Ndarray
+    """
+    read-only 1D array of tonescale values, uniformly sampled on the LUT domain.
+    """
+
+    samples: Ndarray
+    """
+    read-only 1D array of the input values the table was evaluated at.
+    """
+
+    max_error: float
+    """
+    maximum absolute difference between the linear interpolation of the table
+    and the analytic curve, estimated at the middle of each table interval.
+    """
+
+    @property
+    def size(self) -> int:
+        return len(self.table)
+
+    def apply(
+        self,
+        array: Ndarray,
+        out: Optional[Ndarray] = None,
+        dtype: Optional[DTypeLike] = None,
+    ) -> Ndarray:
+        """
+        Apply the tonescale on the given array by linear interpolation of the table.
+
+        Values outside the LUT domain are clamped to the table boundaries.
+
+        Args:
+            array: imagery data as RGB or single channel
+            out: optional array to write the result in, can be ``array`` for in-place.
+            dtype: precision of the output, default to the library precision.
+
+        Returns:
+            new array with the tonescale applied, same shape as input array,
+            or ``out`` if provided.
+        """
+        if out is None:
+            out = numpy.empty(numpy.shape(array), dtype=resolve_dtype(dtype))
+
+        # scalars are converted to the same precision as the output to not upcast it
+        scalar = out.dtype.type
+        table = self.table.astype(out.dtype, copy=False)
+        slopes = numpy.diff(table)
+        last_index = self.size - 2
+        start = scalar(self.samples[0])
+        step = scalar((self.samples[-1] - self.samples[0]) / (self.size - 1))
+
+        # the table is uniform so the position of each value is found directly,
+        # without searching the samples
+        numpy.subtract(array, start, out=out)
+        out /= step
+        numpy.clip(out, 0, last_index + 1, out=out)
+        # XXX: NaN create invalid index, mode="clip" below makes them harmless
+        #   and the result is NaN.
+        with numpy.errstate(invalid="ignore"):
+            # positions are positive so truncation is the same as floor
+            index = out.astype(numpy.intp)
+        # the last sample is interpolated from the last interval
+        numpy.minimum(index, last_index, out=index)
+        out -= index
+
+        out *= slopes.take(index, mode="clip")
+        out += table.take(index, mode="clip")
+        return out
+
+
+@functools.lru_cache(maxsize=32)
+def _bake_AgX_tonescale(
+    min_EV: float,
+    max_EV: float,
+    general_contrast: float,
+    limits_contrast: tuple[float, float],
+    size: int,
+    inverse: bool,
+) -> TonescaleLUT:
+    params = TonescaleParams(min_EV, max_EV, general_contrast, limits_contrast)
+    evaluate = functools.partial(
+        _evaluate_AgX_tonescale, params=params, dtype=numpy.float64
+    )
+    samples = numpy.linspace(0.0, 1.0, size)
+    if inverse:
+        domain = evaluate(numpy.array([0.0, 1.0]))
+        samples = numpy.linspace(domain[0], domain[1], size)
+        evaluate = functools.partial(
+            _evaluate_AgX_tonescale_inverse, params=params, dtype=numpy.float64
+        )
+
+    table = evaluate(samples)
+    # error of a linear interpolation is the biggest near the middle of the intervals
+    midpoints = (samples[:-1] + samples[1:]) * 0.5
+    expected = evaluate(midpoints)
+    interpolated = (table[:-1] + table[1:]) * 0.5
+    max_error = float(numpy.max(numpy.abs(interpolated - expected)))
+
+    samples.setflags(write=False)
+    table.setflags(write=False)
+    return TonescaleLUT(table=table, samples=samples, max_error=max_error)
+
+
+def bake_AgX_tonescale(
     min_EV: float = -10.0,
     max_EV: float = +6.5,
     general_contrast: float = 2.0,
     limits_contrast: tuple[float, float] = (3.0, 3.25),
+    size: int = 4096,
+    max_error: Optional[float] = None,
+    inverse: bool = False,
+) -> TonescaleLUT:
+    """
+    Bake the AgX 1D tonescale curve as a 1D LUT over the [0,1] domain.
+
+    With ``inverse=True`` the inverse of the curve is baked instead, over the range
+    the curve produce for the [0,1] domain.
+
+    LUTs are cached per parameters so baking again with the same parameters
+    is free.
+
+    Args:
+        min_EV: minimal exposure being fitted in the curve [0,1] range.
+        max_EV: maximum exposure being fitted in the curve [0,1] range.
+        general_contrast: increase "s" shape
+        limits_contrast: toe and shoulder contrast
+        size: number of samples in the LUT
+        max_error:
+            if specified, the LUT size is doubled until the maximum interpolation
+            error compared to the analytic curve is below this value.
+        inverse: True to bake the inverse curve, see :func:`invert_AgX_tonescale`.
+
+    Raises:
+        ValueError: if ``max_error`` cannot be reached with a LUT under LUT_MAX_SIZE.
+
+    Returns:
+        baked LUT, that must not be modified.
+    """
+    if size < 2:
+        raise ValueError(f"LUT size must be at least 2, got <{size}>.")
+
+    args = (
+        float(min_EV),
+        float(max_EV),
+        float(general_contrast),
+        (float(limits_contrast[0]), float(limits_contrast[1])),
+    )
+    lut = _bake_AgX_tonescale(*args, size, inverse)
+    if max_error is None:
+        return lut
+
+    while lut.max_error > max_error:
+        if size >= LUT_MAX_SIZE:
+            raise ValueError(
+                f"Cannot bake tonescale with max_error={max_error}: "
+                f"got {lut.max_error} with the maximum LUT size {size}."
+            )
+        size = min(size * 2, LUT_MAX_SIZE)
+        lut = _bake_AgX_tonescale(*args, size, inverse)
+
+    return lut
+
+
+def _apply_baked_AgX_tonescale(
+    array: Ndarray,
+    params: TonescaleParams,
+    size: int,
+    max_error: Optional[float],
+    inverse: bool,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
+) -> Ndarray:
+    if params.channels:
+        if out is None:
+            out = numpy.empty(numpy.shape(array), dtype=resolve_dtype(dtype))
+        return _per_channel(
+            _apply_baked_AgX_tonescale,
+            array,
+            params,
+            out,
+            size=size,
+            max_error=max_error,
+            inverse=inverse,
+        )
+
+    lut = bake_AgX_tonescale(
+        min_EV=params.min_EV,
+        max_EV=params.max_EV,
+        general_contrast=params.general_contrast,
+        limits_contrast=params.limits_contrast,
+        size=size,
+        max_error=max_error,
+        inverse=inverse,
+    )
+    return lut.apply(array, out=out, dtype=dtype)
+
+
+def apply_AgX_tonescale(
+    array: Ndarray,
+    min_EV: Union[float, tuple[float, float, float]] = -10.0,
+    max_EV: Union[float, tuple[float, float, float]] = +6.5,
+    general_contrast: Union[float, tuple[float, float, float]] = 2.0,
+    limits_contrast: Union[tuple[float, float], tuple[tuple, tuple]] = (3.0, 3.25),
+    lut_size: Optional[int] = None,
+    lut_max_error: Optional[float] = None,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
+    params: Optional[TonescaleParams] = None,
 ) -> Ndarray:
     """
     Apply the AgX 1D tonescale curve on the given R-G-B array.
 
+    By default the curve is evaluated analytically for every value.
+
+    Specifying ``lut_size`` or ``lut_max_error`` switch to a variant about twice
+    faster: the curve is baked once (see :func:`bake_AgX_tonescale`) then linearly
+    interpolated, at the cost of the interpolation error. Values outside the [0,1]
+    domain are then clamped.
+
+    All parameters can be per-channel (R, G, B) values, see :class:`TonescaleParams`.
+
     Args:
         array:
             imagery data as RGB or single channel,
@@ -134,24 +699,99 @@ def apply_AgX_tonescale(
         max_EV: maximum exposure being fitted in the curve [0,1] range.
         general_contrast: increase "s" shape
         limits_contrast: toe and shoulder contrast
+        lut_size:
+            number of samples of the baked LUT, 4096 if only ``lut_max_error``
+            is specified.
+        lut_max_error: maximum interpolation error allowed for the baked LUT.
+        out: optional array to write the result in, can be ``array`` for in-place.
+        dtype: precision of the computation, default to the library precision.
+        params:
+            precomputed tonescale parameters, faster when applying the same tonescale
+            many times. If specified, the individual parameters are ignored.
+
+    Raises:
+        ValueError: if ``lut_size`` is lower than 2.
+
+    Returns:
+        new array with the tonescale applied, same shape as input array,
+        or ``out`` if provided.
+    """
+    if params is None:
+        params = TonescaleParams(min_EV, max_EV, general_contrast, limits_contrast)
+
+    if lut_size is not None or lut_max_error is not None:
+        return _apply_baked_AgX_tonescale(
+            array,
+            params,
+            size=4096 if lut_size is None else lut_size,
+            max_error=lut_max_error,
+            inverse=False,
+            out=out,
+            dtype=dtype,
+        )
+
+    return _evaluate_AgX_tonescale(array, params, out=out, dtype=dtype)
+
+
+def invert_AgX_tonescale(
+    array: Ndarray,
+    min_EV: Union[float, tuple[float, float, float]] = -10.0,
+    max_EV: Union[float, tuple[float, float, float]] = +6.5,
+    general_contrast: Union[float, tuple[float, float, float]] = 2.0,
+    limits_contrast: Union[tuple[float, float], tuple[tuple, tuple]] = (3.0, 3.25),
+    lut_size: Optional[int] = None,
+    lut_max_error: Optional[float] = None,
+    out: Optional[Ndarray] = None,
+    dtype: Optional[DTypeLike] = None,
+    params: Optional[TonescaleParams] = None,
+) -> Ndarray:
+    """
+    Inverse of :func:`apply_AgX_tonescale` : convert tonescaled values back to the
+    "shaper space" they were in, given the same parameters.
+
+    By default the inverse is evaluated analytically for every value. Specifying
+    ``lut_size`` or ``lut_max_error`` switch to a baked inverse LUT (see
+    :func:`bake_AgX_tonescale` with ``inverse=True``), where values outside the
+    range of the curve are clamped.
+
+    All parameters can be per-channel (R, G, B) values, see :class:`TonescaleParams`.
+
+    Args:
+        array: imagery data as RGB or single channel, with the tonescale applied.
+        min_EV: minimal exposure being fitted in the curve [0,1] range.
+        max_EV: maximum exposure being fitted in the curve [0,1] range.
+        general_contrast: increase "s" shape
+        limits_contrast: toe and shoulder contrast
+        lut_size:
+            number of samples of the baked LUT, 4096 if only ``lut_max_error``
+            is specified.
+        lut_max_error: maximum interpolation error allowed for the baked LUT.
+        out: optional array to write the result in, can be ``array`` for in-place.
+        dtype: precision of the computation, default to the library precision.
+        params:
+            precomputed tonescale parameters. If specified, the individual
+            parameters are ignored.
+
+    Raises:
+        ValueError: if ``lut_size`` is lower than 2.
 
     Returns:
-        new array with the tonescale applied, same shape as input array.
+        new array with the tonescale removed, same shape as input array,
+        or ``out`` if provided. Values beyond the asymptotes of the curve
+        (which cannot be produced by it) are inf or nan.
     """
-    AgX_x_pivot = numpy.abs(min_EV / (max_EV - min_EV))
-    AgX_y_pivot = 0.50
+    if params is None:
+        params = TonescaleParams(min_EV, max_EV, general_contrast, limits_contrast)
 
-    AgX_x_pivot = numpy.asarray(AgX_x_pivot)
-    AgX_y_pivot = numpy.asarray(AgX_y_pivot)
-    general_contrast = numpy.asarray(general_contrast)
-    limits_contrast = numpy.asarray(limits_contrast)
+    if lut_size is not None or lut_max_error is not None:
+        return _apply_baked_AgX_tonescale(
+            array,
+            params,
+            size=4096 if lut_size is None else lut_size,
+            max_error=lut_max_error,
+            inverse=True,
+            out=out,
+            dtype=dtype,
+        )
 
-    converted = _equation_full_curve(
-        array,
-        AgX_x_pivot,
-        AgX_y_pivot,
-        general_contrast,
-        limits_contrast[0],
-        limits_contrast[1],
-    )
-    return converted
+    return _evaluate_AgX_tonescale_inverse(array, params, out=out, dtype=dtype)